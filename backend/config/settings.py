@@ -172,6 +172,21 @@ DATABASES = {
     #    }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Set CACHE_URL to a shared backend such as redis://host:6379/1 in production.
+# The local memory default evicts the least recently used entries past MAX_ENTRIES.
+
+CACHES = {
+    "default": env.cache_url(
+        "CACHE_URL", default="locmemcache://bookkeeping?MAX_ENTRIES=5000&CULL_FREQUENCY=4"
+    ),
+}
+
+# Cache alias and seconds to keep list responses for, see rental_api/cache.py
+LIST_CACHE_ALIAS = "default"
+LIST_CACHE_TIMEOUT = 300
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
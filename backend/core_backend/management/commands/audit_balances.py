@@ -0,0 +1,168 @@
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import F
+
+from core_backend.models import Account, Property
+from core_backend.signals import balances_changed
+
+
+def audit_shard(account_ids, repair=False, batch_size=500):
+    """
+    Recomputes the balance of each account in the shard with one aggregate
+    query and returns the accounts whose stored balance has drifted.
+    """
+    accounts = (
+        Account.objects.filter(pk__in=account_ids)
+        .only("id", "user_id", "name", "type", "balance", "initial_balance")
+        .with_activity()
+        .order_by("pk")
+    )
+
+    drift = []
+    audited = 0
+    for account in accounts:
+        change = account.net_activity()
+        if change is None:
+            continue
+
+        audited += 1
+        expected = account.initial_balance + change
+        if expected != account.balance:
+            drift.append(
+                {
+                    "account_id": account.id,
+                    "user_id": account.user_id,
+                    "name": account.name,
+                    "stored": str(account.balance),
+                    "expected": str(expected),
+                    "difference": str(expected - account.balance),
+                }
+            )
+
+    repaired = repair_drift(drift, batch_size) if repair and drift else 0
+    return {"audited": audited, "repaired": repaired, "drift": drift}
+
+
+def repair_drift(drift, batch_size):
+    """
+    Moves each drifted balance by its difference in batched UPDATEs. Adding
+    the difference instead of overwriting keeps postings made since the audit.
+    """
+    accounts = []
+    for row in drift:
+        account = Account(pk=row["account_id"])
+        account.balance = F("balance") + Decimal(row["difference"])
+        accounts.append(account)
+
+    with transaction.atomic():
+        repaired = Account.objects.bulk_update(
+            accounts, ["balance"], batch_size=batch_size
+        )
+        Property.bump_data_version(account_ids=[row["account_id"] for row in drift])
+        balances_changed.send(
+            sender=Account, user_ids={row["user_id"] for row in drift}
+        )
+    return repaired
+
+
+def shard_ids(account_ids, shard_size):
+    """
+    Splits the account ids into consecutive shards of at most shard_size.
+    """
+    return [
+        account_ids[i : i + shard_size] for i in range(0, len(account_ids), shard_size)
+    ]
+
+
+def merge_results(results):
+    """
+    Combines the results of audit_shard() over every shard, in shard order.
+    """
+    drift = [row for result in results for row in result["drift"]]
+    return {
+        "accounts_audited": sum(result["audited"] for result in results),
+        "accounts_drifted": len(drift),
+        "accounts_repaired": sum(result["repaired"] for result in results),
+        "drift": drift,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares every account's stored balance with one recomputed from the "
+        "ledger, sharding the accounts across a pool of worker processes, and "
+        "writes a JSON report of the drift found. With --repair, drifted "
+        "balances are corrected in batched updates."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Worker processes. 1 audits in this process.",
+        )
+        parser.add_argument("--shard-size", type=int, default=1000)
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--user", type=int, help="Only audit this user's accounts.")
+        parser.add_argument(
+            "--repair", action="store_true", help="Correct drifted balances."
+        )
+        parser.add_argument("--output", help="Write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1 or options["shard_size"] < 1:
+            raise CommandError("--workers and --shard-size must be at least 1.")
+
+        started_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+
+        accounts = Account.objects.filter(type__isnull=False)
+        if options["user"] is not None:
+            accounts = accounts.filter(user_id=options["user"])
+        account_ids = list(accounts.order_by("pk").values_list("pk", flat=True))
+
+        shards = shard_ids(account_ids, options["shard_size"])
+        results = self.run_shards(shards, options)
+
+        report = {
+            "started_at": started_at.isoformat(),
+            "duration_seconds": round(time.perf_counter() - start, 3),
+            "workers": options["workers"],
+            "shards": len(shards),
+            **merge_results(results),
+        }
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(
+                f"Audited {report['accounts_audited']} accounts, "
+                f"{report['accounts_drifted']} drifted."
+            )
+        else:
+            self.stdout.write(json.dumps(report, indent=2))
+
+    def run_shards(self, shards, options):
+        args = (options["repair"], options["batch_size"])
+
+        can_fork = "fork" in multiprocessing.get_all_start_methods()
+        if options["workers"] == 1 or len(shards) <= 1 or not can_fork:
+            return [audit_shard(shard, *args) for shard in shards]
+
+        # Each forked worker opens its own connections instead of sharing ours
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=options["workers"],
+            mp_context=multiprocessing.get_context("fork"),
+        ) as executor:
+            futures = [executor.submit(audit_shard, shard, *args) for shard in shards]
+            return [future.result() for future in futures]
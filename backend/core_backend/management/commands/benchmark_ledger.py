@@ -0,0 +1,225 @@
+import json
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import Sum
+
+from core_backend.models import (
+    Account,
+    Entity,
+    Journal,
+    JournalItem,
+    Property,
+    RentPayment,
+    Transaction,
+)
+
+BENCHMARK_USERNAME = "ledger-benchmark"
+# Fixed so every run seeds the same ledger and plans stay comparable
+BENCHMARK_SEED = 38
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a large ledger for a dedicated benchmark user and records EXPLAIN "
+        "plans and latencies of the hot ledger queries. Run it once with "
+        "core_backend migrated to 0038 and again after migrating forward to "
+        "compare plans before and after the ledger indexes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--output", help="Write the JSON report to this file.")
+        parser.add_argument(
+            "--cleanup",
+            action="store_true",
+            help="Delete the benchmark user and its ledger after running.",
+        )
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username=BENCHMARK_USERNAME)
+        property_obj = self.seed(user, options["rows"], options["batch_size"])
+
+        report = {
+            "vendor": connection.vendor,
+            "migration": MigrationRecorder.Migration.objects.filter(app="core_backend")
+            .order_by("-id")
+            .values_list("name", flat=True)
+            .first(),
+            "rows": options["rows"],
+            "queries": {},
+        }
+
+        for name, queryset in self.hot_queries(property_obj).items():
+            timings = []
+            for _ in range(options["repeat"]):
+                start = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - start) * 1000)
+
+            report["queries"][name] = {
+                "plan": queryset.explain(),
+                "median_ms": round(statistics.median(timings), 3),
+                "max_ms": round(max(timings), 3),
+            }
+            self.stdout.write(f"{name}: {report['queries'][name]['median_ms']} ms")
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(report, output, indent=2)
+        else:
+            self.stdout.write(json.dumps(report, indent=2))
+
+        if options["cleanup"]:
+            user.delete()
+
+    def seed(self, user, rows, batch_size):
+        # Rows are spread over all the properties, so compare the user's total
+        property_obj = Property.objects.filter(user=user).order_by("pk").first()
+        if property_obj and Transaction.objects.filter(user=user).count() >= rows:
+            return property_obj
+
+        self.stdout.write(f"Seeding {rows} rows per ledger table...")
+        random.seed(BENCHMARK_SEED)
+        Property.objects.filter(user=user).delete()
+        Account.objects.filter(user=user).delete()
+
+        properties = Property.objects.bulk_create(
+            [
+                Property(user=user, name=f"Benchmark {i}", address=f"{i} Bench St")
+                for i in range(10)
+            ]
+        )
+        property_obj = properties[0]
+
+        accounts = Account.objects.bulk_create(
+            [
+                Account(user=user, name=f"Account {i}", type=account_type)
+                for i, account_type in enumerate(
+                    ["bank", "expense", "revenue", "liability", "equity"] * 4
+                )
+            ]
+        )
+        for prop in properties:
+            prop.accounts.add(*random.sample(accounts, 5))
+
+        entities = Entity.objects.bulk_create(
+            [
+                Entity(user=user, property=random.choice(properties), name=f"Entity {i}")
+                for i in range(500)
+            ]
+        )
+
+        start_date = date.today() - timedelta(days=3650)
+
+        def random_date():
+            return start_date + timedelta(days=random.randrange(3650))
+
+        for offset in range(0, rows, batch_size):
+            count = min(batch_size, rows - offset)
+
+            Transaction.objects.bulk_create(
+                [
+                    Transaction(
+                        user=user,
+                        property=random.choice(properties),
+                        account=random.choice(accounts),
+                        entity=random.choice(entities),
+                        date=random_date(),
+                        amount=random.randrange(100, 100_000) / 100,
+                        type=random.choice(["debit", "credit"]),
+                        is_deleted=random.random() < 0.05,
+                    )
+                    for _ in range(count)
+                ]
+            )
+
+            RentPayment.objects.bulk_create(
+                [
+                    RentPayment(
+                        user=user,
+                        property=random.choice(properties),
+                        entity=random.choice(entities),
+                        amount=random.randrange(50_000, 300_000) / 100,
+                        date=random_date(),
+                        status=random.choice(["scheduled", "paid", "due", "overdue"]),
+                        is_deleted=random.random() < 0.05,
+                    )
+                    for _ in range(count)
+                ]
+            )
+
+            journals = Journal.objects.bulk_create(
+                [
+                    Journal(
+                        user=user,
+                        property=random.choice(properties),
+                        name="Benchmark journal",
+                        date=random_date(),
+                    )
+                    for _ in range(count // 2)
+                ]
+            )
+            JournalItem.objects.bulk_create(
+                [
+                    JournalItem(
+                        user=user,
+                        journal=journal,
+                        account=random.choice(accounts),
+                        type=item_type,
+                        amount=100,
+                    )
+                    for journal in journals
+                    for item_type in ("debit", "credit")
+                ]
+            )
+
+            self.stdout.write(f"  {offset + count}/{rows}")
+
+        return property_obj
+
+    def hot_queries(self, property_obj):
+        account = property_obj.accounts.first()
+        entity = property_obj.entities.first()
+        latest = property_obj.transactions.order_by("-date").values_list(
+            "date", flat=True
+        )[:1]
+        month = latest[0] if latest else date.today()
+
+        return {
+            "transactions_page": Transaction.objects.filter(
+                user=property_obj.user, property=property_obj
+            ).order_by("date", "id")[:100],
+            "transactions_by_account": Transaction.objects.filter(
+                property=property_obj, account=account
+            ),
+            "transactions_by_entity": Transaction.objects.filter(
+                property=property_obj, entity=entity
+            ),
+            "journals_page": Journal.objects.filter(property=property_obj).order_by(
+                "date", "id"
+            )[:100],
+            "journal_items_by_account": JournalItem.objects.filter(account=account),
+            "rent_payments_month": RentPayment.objects.filter(
+                property=property_obj, date__year=month.year, date__month=month.month
+            ),
+            "rent_month_summary": RentPayment.objects.filter(
+                property=property_obj,
+                is_deleted=False,
+                date__year=month.year,
+                date__month=month.month,
+            )
+            .values("status")
+            .annotate(total=Sum("amount")),
+            "rent_overdue_sweep": RentPayment.objects.filter(
+                status="due", is_deleted=False, date__lt=date.today()
+            ).values("id")[:10_000],
+        }
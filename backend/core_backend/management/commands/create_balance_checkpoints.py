@@ -0,0 +1,59 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core_backend.models import Account, AccountBalanceCheckpoint, month_end
+
+
+class Command(BaseCommand):
+    help = (
+        "Stores every account's balance at a month end as a checkpoint, so "
+        "as-of balance lookups only replay activity since the checkpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--period-end",
+            help="Month-end date (YYYY-MM-DD). Defaults to the end of last month.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        if options["period_end"]:
+            try:
+                period_end = date.fromisoformat(options["period_end"])
+            except ValueError:
+                raise CommandError("--period-end must be a YYYY-MM-DD date.")
+            if period_end != month_end(period_end):
+                raise CommandError("--period-end must be the last day of a month.")
+        else:
+            period_end = date.today().replace(day=1) - timedelta(days=1)
+
+        checkpoints = []
+        created = 0
+
+        for account in Account.objects.filter(type__isnull=False).iterator():
+            balance = account.balance_as_of(period_end)
+            if balance is None:
+                continue
+
+            checkpoints.append(
+                AccountBalanceCheckpoint(
+                    account=account, period_end=period_end, balance=balance
+                )
+            )
+            if len(checkpoints) >= options["batch_size"]:
+                created += self.save(checkpoints)
+                checkpoints = []
+
+        created += self.save(checkpoints)
+        self.stdout.write(f"Stored {created} checkpoints for {period_end}.")
+
+    def save(self, checkpoints):
+        AccountBalanceCheckpoint.objects.bulk_create(
+            checkpoints,
+            update_conflicts=True,
+            unique_fields=["account", "period_end"],
+            update_fields=["balance", "updated_at"],
+        )
+        return len(checkpoints)
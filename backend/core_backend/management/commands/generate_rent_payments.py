@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core_backend.models import RentSchedule
+
+
+class Command(BaseCommand):
+    help = (
+        "Materializes scheduled rent payments from the active rent schedules "
+        "for the current month and the months after it. Safe to rerun, months "
+        "that already have a payment are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--months", type=int, default=3)
+        parser.add_argument(
+            "--property",
+            type=int,
+            action="append",
+            dest="property_ids",
+            help="Only generate for this property. May be repeated.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        if options["months"] < 1:
+            raise CommandError("--months must be at least 1.")
+
+        schedules = RentSchedule.objects.all()
+        if options["property_ids"]:
+            schedules = schedules.filter(property_id__in=options["property_ids"])
+
+        created = RentSchedule.generate_payments(
+            months=options["months"],
+            schedules=schedules,
+            batch_size=options["batch_size"],
+        )
+
+        for property_id, count in sorted(created.items()):
+            self.stdout.write(f"Property {property_id}: {count} payments created.")
+        self.stdout.write(f"Created {sum(created.values())} scheduled rent payments.")
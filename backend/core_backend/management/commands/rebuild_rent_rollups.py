@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from core_backend.models import RentPaymentRollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the monthly rent rollups behind the rent summaries from the "
+        "rent payments, for every property or only the given ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--property",
+            type=int,
+            action="append",
+            dest="property_ids",
+            help="Only rebuild this property. May be repeated.",
+        )
+
+    def handle(self, *args, **options):
+        created = RentPaymentRollup.rebuild(property_ids=options["property_ids"])
+        self.stdout.write(f"Rebuilt {created} rent rollup rows.")
@@ -0,0 +1,48 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core_backend.models import RentPayment
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves rent payments from scheduled to due on their date, and to "
+        "overdue once the grace period after it has passed. Meant to run "
+        "nightly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-days",
+            type=int,
+            default=5,
+            help="Days after the due date before a payment is overdue.",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--date",
+            type=date.fromisoformat,
+            help="Sweep as of this YYYY-MM-DD date instead of today.",
+        )
+
+    def handle(self, *args, **options):
+        if options["grace_days"] < 0 or options["batch_size"] < 1:
+            raise CommandError(
+                "--grace-days must not be negative and --batch-size must be at least 1."
+            )
+
+        swept = RentPayment.sweep_statuses(
+            today=options["date"],
+            grace_days=options["grace_days"],
+            batch_size=options["batch_size"],
+        )
+
+        for property_id, counts in sorted(swept.items(), key=lambda item: item[0] or 0):
+            self.stdout.write(
+                f"Property {property_id}: {counts.get('due', 0)} due, "
+                f"{counts.get('overdue', 0)} overdue."
+            )
+        self.stdout.write(
+            f"Swept {sum(sum(counts.values()) for counts in swept.values())} rent payments."
+        )
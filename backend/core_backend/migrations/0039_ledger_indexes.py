@@ -0,0 +1,47 @@
+# Generated by Django 5.2 on 2026-10-18 20:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_backend', '0038_alter_reporthistory_report_ran_on_date'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='journal',
+            index=models.Index(fields=['property', 'date', 'id'], name='journal_property_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='journalitem',
+            index=models.Index(fields=['account', 'journal'], name='journalitem_account_jrnl_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rentpayment',
+            index=models.Index(fields=['property', 'date', 'id'], name='rentpayment_property_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rentpayment',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['property', 'status', 'date'], name='rentpayment_live_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rentpayment',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['status', 'date'], name='rentpayment_live_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['property', 'date', 'id'], name='transaction_property_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['account', 'date'], name='transaction_account_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['entity', 'date'], name='transaction_entity_date_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-18 20:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_backend', '0040_accountbalancecheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reporthistory',
+            name='ledger_version',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reporthistory',
+            name='result',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reporthistory',
+            name='snapshot_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='LedgerPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(null=True)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_postings', to='core_backend.account')),
+                ('property', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ledger_postings', to='core_backend.property')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['property', 'id'], name='core_backen_propert_72db85_idx')],
+            },
+        ),
+    ]
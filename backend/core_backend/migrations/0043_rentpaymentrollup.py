@@ -0,0 +1,50 @@
+# Generated by Django 5.2 on 2026-10-18 20:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def build_rollups(apps, schema_editor):
+    RentPayment = apps.get_model("core_backend", "RentPayment")
+    RentPaymentRollup = apps.get_model("core_backend", "RentPaymentRollup")
+
+    rows = (
+        RentPayment.objects.filter(
+            property__isnull=False, date__isnull=False, is_deleted=False
+        )
+        .annotate(month=TruncMonth("date"))
+        .values("property_id", "month", "status")
+        .annotate(count=Count("id"), total_amount=Sum("amount"))
+        .order_by()
+    )
+    RentPaymentRollup.objects.bulk_create(
+        [RentPaymentRollup(**row) for row in rows], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_backend', '0042_period_close'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RentPaymentRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('status', models.CharField(max_length=25)),
+                ('count', models.IntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rent_rollups', to='core_backend.property')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('property', 'month', 'status'), name='unique_rent_rollup')],
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
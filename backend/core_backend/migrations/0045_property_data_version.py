@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 20:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_backend', '0044_rentschedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='data_version',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 21:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_backend', '0045_property_data_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reporthistory',
+            name='ledger_postings',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -1,7 +1,17 @@
-from django.db import models
+import calendar
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Func, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
 from django.contrib.auth.models import User
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.utils import timezone
 from phonenumber_field.modelfields import PhoneNumberField
 
+from .signals import balances_changed
+
 ACCOUNT_TYPE_CHOICES = [
     ("asset", "Asset"),
     ("liability", "Liability"),
@@ -13,6 +23,73 @@ ACCOUNT_TYPE_CHOICES = [
 ]
 
 
+def month_end(day):
+    return date(day.year, day.month, calendar.monthrange(day.year, day.month)[1])
+
+
+def _date_filters(field, start=None, end=None):
+    filters = {}
+    if start is not None:
+        filters[f"{field}__gte"] = start
+    if end is not None:
+        filters[f"{field}__lte"] = end
+    return filters
+
+
+def _total_subquery(queryset):
+    """
+    Correlated SUM(amount) subquery that is zero when nothing matches.
+    """
+    total = (
+        queryset.order_by()
+        .annotate(total=Func(F("amount"), function="SUM"))
+        .values("total")
+    )
+    amount_field = models.DecimalField(max_digits=15, decimal_places=2)
+    return Coalesce(
+        Subquery(total, output_field=amount_field),
+        Value(Decimal("0.00"), output_field=amount_field),
+    )
+
+
+class AccountQuerySet(models.QuerySet):
+    def with_activity(self, start=None, end=None, property=None):
+        """
+        Annotates each account with its debit, credit, untyped and paid rent
+        totals for postings dated within [start, end], as correlated subqueries
+        of a single query. Passing a property limits the postings to it.
+        """
+        transactions = Transaction.objects.filter(
+            account=OuterRef("pk"), **_date_filters("date", start, end)
+        )
+        journal_items = JournalItem.objects.filter(
+            account=OuterRef("pk"), **_date_filters("journal__date", start, end)
+        )
+        rent_payments = RentPayment.objects.filter(
+            property__accounts=OuterRef("pk"),
+            status="paid",
+            is_deleted=False,
+            **_date_filters("date", start, end),
+        )
+
+        if property is not None:
+            transactions = transactions.filter(property=property)
+            journal_items = journal_items.filter(journal__property=property)
+            rent_payments = rent_payments.filter(property=property)
+
+        return self.annotate(
+            debit_total=_total_subquery(transactions.filter(type="debit"))
+            + _total_subquery(journal_items.filter(type="debit")),
+            credit_total=_total_subquery(transactions.filter(type="credit"))
+            + _total_subquery(journal_items.filter(type="credit")),
+            untyped_total=_total_subquery(
+                transactions.exclude(type__in=["debit", "credit"])
+            )
+            + _total_subquery(journal_items.exclude(type__in=["debit", "credit"])),
+            rent_total=_total_subquery(rent_payments),
+        )
+
+
 class Account(models.Model):
     user = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="accounts", null=True
@@ -34,6 +111,8 @@ class Account(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = AccountQuerySet.as_manager()
+
     # Calculates normal balance based on account type
     @property
     def normal_balance(self):
@@ -48,45 +127,147 @@ class Account(models.Model):
             return "credit"
         return "na"
 
+    # Signed change an item makes to this account's balance, None for "na" normals
+    def balance_delta(self, item, is_reversal=False):
+        if self.normal_balance == "na":
+            return None
+
+        if isinstance(item, RentPayment):
+            is_increase = True if self.normal_balance == "credit" else False
+        elif hasattr(item, "type"):
+            is_increase = (self.normal_balance == "debit" and item.type == "debit") or (
+                self.normal_balance == "credit" and item.type == "credit"
+            )
+        else:
+            return Decimal("0.00")
+
+        if is_reversal:
+            is_increase = not is_increase
+
+        return item.amount if is_increase else -item.amount
+
     def update_balance(self, item, is_reversal=False):
-        amount = item.amount
+        delta = self.balance_delta(item, is_reversal=is_reversal)
 
         # Early return for account normals of "na"
-        if self.normal_balance == "na":
+        if delta is None:
             print(
                 f"Skipping balance update for account '{self.name}' with 'na' normal balance."
             )
             return
 
-        if isinstance(item, RentPayment):
-            is_increase = True if self.normal_balance == "credit" else False
-
-            if is_reversal:
-                is_increase = not is_increase
+        Account.apply_balance_deltas(
+            {(self.pk, posting_date(item), posting_property_id(item)): delta}
+        )
+
+    @classmethod
+    def apply_balance_deltas(cls, deltas):
+        """
+        Applies balance changes keyed by (account id, posting date, property id)
+        as atomic F() updates of the balance column only, one per account, moves
+        the balance checkpoints at or after each posting date and appends the
+        changes to the ledger posting log. Rows are locked in id order first, so
+        concurrent postings cannot deadlock. Sends balances_changed with the
+        accounts' owners.
+        """
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+
+        account_deltas = {}
+        checkpoint_deltas = {}
+        for (account_id, day, _), delta in deltas.items():
+            account_deltas[account_id] = account_deltas.get(account_id, 0) + delta
+
+            # Checkpoints are taken at month ends, so postings bucket by month
+            if day is not None:
+                key = (account_id, month_end(day))
+                checkpoint_deltas[key] = checkpoint_deltas.get(key, 0) + delta
+
+        # A posting moved between months can net to zero on the balance alone
+        account_ids = sorted(
+            {account_id for account_id, delta in account_deltas.items() if delta}
+            | {key[0] for key, delta in checkpoint_deltas.items() if delta}
+        )
+        if not account_ids:
+            return
 
-            if is_increase:
-                self.balance += amount
-            else:
-                self.balance -= amount
+        with transaction.atomic():
+            # The lock also reads the owners balances_changed is sent with
+            user_ids = set(
+                cls.objects.select_for_update()
+                .filter(pk__in=account_ids)
+                .order_by("pk")
+                .values_list("user_id", flat=True)
+            )
 
-        elif hasattr(item, "type"):
-            is_increase = (self.normal_balance == "debit" and item.type == "debit") or (
-                self.normal_balance == "credit" and item.type == "credit"
+            for account_id in account_ids:
+                if account_deltas.get(account_id):
+                    cls.objects.filter(pk=account_id).update(
+                        balance=F("balance") + account_deltas[account_id]
+                    )
+
+            for (account_id, period_end), delta in sorted(checkpoint_deltas.items()):
+                if delta:
+                    AccountBalanceCheckpoint.objects.filter(
+                        account_id=account_id, period_end__gte=period_end
+                    ).update(balance=F("balance") + delta)
+
+            LedgerPosting.objects.bulk_create(
+                [
+                    LedgerPosting(
+                        account_id=account_id,
+                        date=day,
+                        property_id=property_id,
+                        amount=delta,
+                    )
+                    for (account_id, day, property_id), delta in deltas.items()
+                ]
             )
 
-            if is_reversal:
-                is_increase = not is_increase
+            balances_changed.send(sender=cls, user_ids=user_ids)
 
-            if is_increase:
-                self.balance += amount
-            else:
-                self.balance -= amount
+    # Signed balance change from the totals annotated by with_activity()
+    def net_activity(self):
+        if self.normal_balance == "na":
+            return None
 
-        self.save()
+        if self.normal_balance == "debit":
+            change = self.debit_total - self.credit_total
+        else:
+            change = self.credit_total - self.debit_total
+        change -= self.untyped_total
 
-    def audit_balance(self):
-        balance = self.initial_balance
+        if self.type == "revenue":
+            change += self.rent_total
+
+        return change
+
+    def balance_as_of(self, as_of):
+        """
+        Balance at the end of as_of, answered from the nearest checkpoint on or
+        before it plus the activity since. None for "na" normals.
+        """
+        checkpoint = (
+            self.balance_checkpoints.filter(period_end__lte=as_of)
+            .order_by("-period_end")
+            .first()
+        )
+
+        if checkpoint:
+            opening = checkpoint.balance
+            start = checkpoint.period_end + timedelta(days=1)
+        else:
+            opening = self.initial_balance
+            start = None
+
+        account = Account.objects.with_activity(start=start, end=as_of).get(pk=self.pk)
+        change = account.net_activity()
+        return None if change is None else opening + change
 
+    def audit_balance(self):
+        """
+        Recomputes the balance from the ledger with one aggregate query
+        instead of walking every posting.
+        """
         # Early return for account normals of "na"
         if self.normal_balance == "na":
             print(
@@ -94,35 +275,31 @@ class Account(models.Model):
             )
             return
 
-        for item in self.transactions.all():
-            is_increase = (self.normal_balance == "debit" and item.type == "debit") or (
-                self.normal_balance == "credit" and item.type == "credit"
-            )
-
-            if is_increase:
-                balance += item.amount
-            else:
-                balance -= item.amount
+        account = Account.objects.with_activity().get(pk=self.pk)
+        return self.initial_balance + account.net_activity()
 
-        for item in self.journal_items.all():
-            is_increase = (self.normal_balance == "debit" and item.type == "debit") or (
-                self.normal_balance == "credit" and item.type == "credit"
-            )
+    def __str__(self):
+        return self.name + "_" + str(self.id)
 
-            if is_increase:
-                balance += item.amount
-            else:
-                balance -= item.amount
 
-        if self.type == "revenue":
-            for property in self.properties.all():
-                for rent_payment in property.rent_payments.filter(status="paid"):
-                    balance += rent_payment.amount
+class AccountBalanceCheckpoint(models.Model):
+    account = models.ForeignKey(
+        Account, on_delete=models.CASCADE, related_name="balance_checkpoints"
+    )
+    period_end = models.DateField()
+    balance = models.DecimalField(max_digits=15, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
-        return balance
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["account", "period_end"], name="unique_account_checkpoint"
+            ),
+        ]
 
     def __str__(self):
-        return self.name + "_" + str(self.id)
+        return f"{self.account}: {self.period_end}"
 
 
 class Property(models.Model):
@@ -151,13 +328,112 @@ class Property(models.Model):
     notes = models.JSONField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
     is_deleted = models.BooleanField(default=False)
+    # Bumped by every write to the property's data, conditional GETs use it as ETag
+    data_version = models.BigIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    @classmethod
+    def bump_data_version(cls, property_ids=(), account_ids=()):
+        """
+        Moves the data version of the given properties, and of every property
+        linked to one of the given accounts since their balances show there.
+        Writes call it last, so property rows are locked after any accounts.
+        """
+        property_ids = {pk for pk in property_ids if pk is not None}
+        account_ids = {pk for pk in account_ids if pk is not None}
+        if not property_ids and not account_ids:
+            return 0
+
+        return cls.objects.filter(
+            models.Q(pk__in=property_ids) | models.Q(accounts__in=account_ids)
+        ).update(data_version=F("data_version") + 1)
+
+    # Last day of the latest closed period, None when no period is closed
+    def closed_through(self):
+        return self.period_closes.aggregate(closed_through=Max("period_end"))[
+            "closed_through"
+        ]
+
     def __str__(self):
         return self.name
 
 
+class PeriodClose(models.Model):
+    """
+    A fiscal period of a property closed against edits. Postings dated on or
+    before period_end are locked, and the closing balance of every account is
+    stored so later reports start from it instead of rescanning history.
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="period_closes", null=True
+    )
+    property = models.ForeignKey(
+        Property, on_delete=models.CASCADE, related_name="period_closes"
+    )
+    period_end = models.DateField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["property", "period_end"], name="unique_property_period_close"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.property}: {self.period_end}"
+
+
+class ClosingBalance(models.Model):
+    period_close = models.ForeignKey(
+        PeriodClose, on_delete=models.CASCADE, related_name="closing_balances"
+    )
+    account = models.ForeignKey(
+        Account, on_delete=models.CASCADE, related_name="closing_balances"
+    )
+    balance = models.DecimalField(max_digits=15, decimal_places=2)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["period_close", "account"], name="unique_closing_balance"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.account}: {self.balance}"
+
+
+class LedgerPosting(models.Model):
+    """
+    Append-only log of the signed balance changes made to accounts. Ids are
+    taken at insert, not commit, so a posting can commit below the latest id
+    of its property. Anything cached against that id also keeps the number of
+    postings up to it, and replays the postings made since only while that
+    number is unchanged.
+    """
+
+    account = models.ForeignKey(
+        Account, on_delete=models.CASCADE, related_name="ledger_postings"
+    )
+    property = models.ForeignKey(
+        Property, on_delete=models.CASCADE, related_name="ledger_postings", null=True
+    )
+    date = models.DateField(null=True)
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["property", "id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.account}: {self.amount}"
+
+
 class Entity(models.Model):
     user = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="entities", null=True
@@ -212,6 +488,15 @@ class Transaction(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["property", "date", "id"], name="transaction_property_date_idx"
+            ),
+            models.Index(fields=["account", "date"], name="transaction_account_date_idx"),
+            models.Index(fields=["entity", "date"], name="transaction_entity_date_idx"),
+        ]
+
 
 class Journal(models.Model):
     user = models.ForeignKey(
@@ -227,6 +512,13 @@ class Journal(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["property", "date", "id"], name="journal_property_date_idx"
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -256,6 +548,134 @@ class JournalItem(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Journal dates live on the journal, so account lookups join through it
+            models.Index(
+                fields=["account", "journal"], name="journalitem_account_jrnl_idx"
+            ),
+        ]
+
+
+class RentSchedule(models.Model):
+    """
+    Recurring monthly rent owed by an entity for a property. Scheduled rent
+    payments are materialized from it ahead of time by generate_payments().
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="rent_schedules", null=True
+    )
+    property = models.ForeignKey(
+        Property, on_delete=models.CASCADE, related_name="rent_schedules"
+    )
+    entity = models.ForeignKey(
+        Entity, on_delete=models.CASCADE, related_name="rent_schedules"
+    )
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    # Days past the end of a short month fall on its last day
+    day_of_month = models.PositiveSmallIntegerField(
+        validators=[MinValueValidator(1), MaxValueValidator(31)]
+    )
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.entity}: ${self.amount} on day {self.day_of_month}"
+
+    def due_date(self, month):
+        """
+        The day rent falls due in the month starting at month, or None when
+        the schedule does not cover that month.
+        """
+        day = min(self.day_of_month, month_end(month).day)
+        due_date = month.replace(day=day)
+
+        if due_date < self.start_date:
+            return None
+        if self.end_date and due_date > self.end_date:
+            return None
+        return due_date
+
+    @classmethod
+    def generate_payments(cls, months=3, today=None, schedules=None, batch_size=500):
+        """
+        Materializes scheduled rent payments for the current month and the
+        months after it, months in all, with bulk inserts. Months that already
+        have a payment for a schedule are skipped, so reruns create nothing.
+        Returns the number of payments created per property id.
+        """
+        today = today or date.today()
+        first_month = today.replace(day=1)
+        month_starts = []
+        for offset in range(months):
+            index = first_month.year * 12 + first_month.month - 1 + offset
+            month_starts.append(date(index // 12, index % 12 + 1, 1))
+        window_end = month_end(month_starts[-1])
+
+        schedules = (cls.objects.all() if schedules is None else schedules).filter(
+            models.Q(end_date__isnull=True) | models.Q(end_date__gte=first_month),
+            is_active=True,
+            start_date__lte=window_end,
+        )
+        schedule_ids = list(schedules.order_by("pk").values_list("pk", flat=True))
+
+        created = {}
+        for i in range(0, len(schedule_ids), batch_size):
+            with transaction.atomic():
+                # Locking the schedules first serializes concurrent runs, the
+                # second one sees the payments the first committed
+                chunk = list(
+                    cls.objects.select_for_update()
+                    .filter(pk__in=schedule_ids[i : i + batch_size])
+                    .order_by("pk")
+                )
+
+                # Served by the (schedule, date) unique index
+                existing = {
+                    (schedule_id, day.replace(day=1))
+                    for schedule_id, day in RentPayment.objects.filter(
+                        schedule__in=[schedule.pk for schedule in chunk],
+                        date__gte=first_month,
+                        date__lte=window_end,
+                    ).values_list("schedule_id", "date")
+                }
+
+                rent_payments = []
+                for schedule in chunk:
+                    for month in month_starts:
+                        due_date = schedule.due_date(month)
+                        if due_date is None or (schedule.pk, month) in existing:
+                            continue
+
+                        rent_payments.append(
+                            RentPayment(
+                                user_id=schedule.user_id,
+                                property_id=schedule.property_id,
+                                entity_id=schedule.entity_id,
+                                schedule=schedule,
+                                amount=schedule.amount,
+                                date=due_date,
+                                status="scheduled",
+                            )
+                        )
+
+                RentPayment.objects.bulk_create(rent_payments, batch_size=1000)
+                RentPaymentRollup.apply_deltas(RentPaymentRollup.deltas(rent_payments))
+
+                for rent_payment in rent_payments:
+                    created[rent_payment.property_id] = (
+                        created.get(rent_payment.property_id, 0) + 1
+                    )
+                Property.bump_data_version(
+                    {rent_payment.property_id for rent_payment in rent_payments}
+                )
+
+        return created
+
 
 class RentPayment(models.Model):
     user = models.ForeignKey(
@@ -267,6 +687,13 @@ class RentPayment(models.Model):
     entity = models.ForeignKey(
         Entity, on_delete=models.CASCADE, related_name="rent_payments", null=True
     )
+    schedule = models.ForeignKey(
+        RentSchedule,
+        on_delete=models.SET_NULL,
+        related_name="rent_payments",
+        null=True,
+        blank=True,
+    )
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     date = models.DateField(null=True)
     status = models.CharField(
@@ -283,9 +710,224 @@ class RentPayment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["property", "date", "id"], name="rentpayment_property_date_idx"
+            ),
+            # Partial indexes only cover rows that have not been soft deleted
+            models.Index(
+                fields=["property", "status", "date"],
+                condition=models.Q(is_deleted=False),
+                name="rentpayment_live_status_idx",
+            ),
+            models.Index(
+                fields=["status", "date"],
+                condition=models.Q(is_deleted=False),
+                name="rentpayment_live_due_idx",
+            ),
+        ]
+        constraints = [
+            # One payment per schedule and due date, which also indexes lookups
+            models.UniqueConstraint(
+                fields=["schedule", "date"],
+                condition=models.Q(schedule__isnull=False),
+                name="unique_scheduled_rent_payment",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.entity.name}: ${self.amount}"
 
+    @classmethod
+    def sweep_statuses(cls, today=None, grace_days=0, batch_size=5000):
+        """
+        Moves live rent payments along scheduled -> due -> overdue by date,
+        in batched UPDATEs. Payments fall due on their date and are overdue
+        once grace_days have passed after it. Returns the number of payments
+        moved to each status per property id.
+        """
+        today = today or date.today()
+        overdue_before = today - timedelta(days=grace_days)
+        transitions = [
+            (("scheduled", "due"), "overdue", {"date__lt": overdue_before}),
+            (("scheduled",), "due", {"date__lte": today}),
+        ]
+
+        swept = {}
+        for from_statuses, to_status, date_filter in transitions:
+            # Served by the partial (status, date) index on live payments
+            candidates = cls.objects.filter(
+                is_deleted=False, status__in=from_statuses, **date_filter
+            )
+            while True:
+                with transaction.atomic():
+                    ids = list(
+                        candidates.select_for_update()
+                        .order_by("pk")
+                        .values_list("pk", flat=True)[:batch_size]
+                    )
+                    if not ids:
+                        break
+
+                    batch = cls.objects.filter(pk__in=ids)
+                    rows = (
+                        batch.annotate(month=TruncMonth("date"))
+                        .values("property_id", "month", "status")
+                        .annotate(count=Count("id"), amount=Sum("amount"))
+                        .order_by()
+                    )
+
+                    deltas = {}
+                    for row in rows:
+                        counts = swept.setdefault(row["property_id"], {})
+                        counts[to_status] = counts.get(to_status, 0) + row["count"]
+
+                        if row["property_id"] is None:
+                            continue
+                        for status, sign in ((row["status"], -1), (to_status, 1)):
+                            key = (row["property_id"], row["month"], status)
+                            count, amount = deltas.get(key, (0, 0))
+                            deltas[key] = (
+                                count + sign * row["count"],
+                                amount + sign * row["amount"],
+                            )
+
+                    batch.update(status=to_status, updated_at=timezone.now())
+                    RentPaymentRollup.apply_deltas(deltas)
+                    Property.bump_data_version({key[0] for key in deltas})
+
+        return swept
+
+
+class RentPaymentRollup(models.Model):
+    """
+    Count and total of a property's live rent payments per month and status.
+    Rent payment writes keep it current with apply_deltas(), and rebuild()
+    recomputes it from the payments for backfills.
+    """
+
+    property = models.ForeignKey(
+        Property, on_delete=models.CASCADE, related_name="rent_rollups"
+    )
+    month = models.DateField()
+    status = models.CharField(max_length=25)
+    count = models.IntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["property", "month", "status"], name="unique_rent_rollup"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.property}: {self.month} {self.status}"
+
+    @staticmethod
+    def key(rent_payment):
+        # Deleted and undated payments are not part of any month
+        if rent_payment.is_deleted or not rent_payment.date:
+            return None
+        return (
+            rent_payment.property_id,
+            rent_payment.date.replace(day=1),
+            rent_payment.status,
+        )
+
+    @classmethod
+    def deltas(cls, rent_payments, sign=1, deltas=None):
+        """
+        Adds the (count, amount) changes of adding, or with sign=-1 removing,
+        rent payments to a dict keyed by (property id, month, status).
+        """
+        deltas = {} if deltas is None else deltas
+        for rent_payment in rent_payments:
+            key = cls.key(rent_payment)
+            if key is None:
+                continue
+            count, amount = deltas.get(key, (0, 0))
+            deltas[key] = (count + sign, amount + sign * rent_payment.amount)
+        return deltas
+
+    @classmethod
+    def apply_deltas(cls, deltas):
+        """
+        Applies (count, amount) changes as atomic F() updates, creating the
+        rollup rows that do not exist yet.
+        """
+        for (property_id, month, status), (count, amount) in sorted(deltas.items()):
+            if not count and not amount:
+                continue
+
+            rollups = cls.objects.filter(
+                property_id=property_id, month=month, status=status
+            )
+            changes = {
+                "count": F("count") + count,
+                "total_amount": F("total_amount") + amount,
+            }
+            if rollups.update(**changes):
+                continue
+
+            try:
+                with transaction.atomic():
+                    cls.objects.create(
+                        property_id=property_id,
+                        month=month,
+                        status=status,
+                        count=count,
+                        total_amount=amount,
+                    )
+            except IntegrityError:
+                # Another writer created the row first
+                rollups.update(**changes)
+
+    @classmethod
+    @transaction.atomic
+    def rebuild(cls, property_ids=None):
+        """
+        Recomputes the rollups of the given properties, or of every property,
+        from their rent payments with one grouped query.
+        """
+        rollups = cls.objects.all()
+        rent_payments = RentPayment.objects.filter(
+            property__isnull=False, date__isnull=False, is_deleted=False
+        )
+        if property_ids is not None:
+            rollups = rollups.filter(property_id__in=property_ids)
+            rent_payments = rent_payments.filter(property_id__in=property_ids)
+
+        rollups.delete()
+        rows = (
+            rent_payments.annotate(month=TruncMonth("date"))
+            .values("property_id", "month", "status")
+            .annotate(count=Count("id"), total_amount=Sum("amount"))
+            .order_by()
+        )
+        created = len(cls.objects.bulk_create([cls(**row) for row in rows]))
+
+        properties = Property.objects.all()
+        if property_ids is not None:
+            properties = properties.filter(pk__in=property_ids)
+        properties.update(data_version=F("data_version") + 1)
+        return created
+
+
+# Date a ledger item posts on, journal items take their journal's date
+def posting_date(item):
+    if isinstance(item, JournalItem):
+        return item.journal.date if item.journal_id else None
+    return getattr(item, "date", None)
+
+
+def posting_property_id(item):
+    if isinstance(item, JournalItem):
+        return item.journal.property_id if item.journal_id else None
+    return getattr(item, "property_id", None)
+
 
 REPORT_TYPE_CHOICES = [
     ("na", "NA"),
@@ -325,5 +967,11 @@ class ReportHistory(models.Model):
     start_date = models.DateField(null=True)
     end_date = models.DateField(null=True)
     report_ran_on_date = models.DateField(null=True, auto_now_add=True)
+    # Cached report result and the property ledger version it was computed at
+    result = models.JSONField(null=True, blank=True)
+    ledger_version = models.BigIntegerField(null=True, blank=True)
+    # Postings with ids up to ledger_version when it was taken
+    ledger_postings = models.BigIntegerField(null=True, blank=True)
+    snapshot_at = models.DateTimeField(null=True, blank=True)
     is_deleted = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,4 @@
+from django.dispatch import Signal
+
+# Sent with the user_ids of the accounts whose stored balances a write moved
+balances_changed = Signal()
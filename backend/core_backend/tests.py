@@ -1,3 +1,438 @@
-from django.test import TestCase
+import json
+import random
+import threading
+from datetime import date
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+
+from .management.commands.audit_balances import (
+    audit_shard,
+    merge_results,
+    shard_ids,
+)
+from .models import (
+    Account,
+    AccountBalanceCheckpoint,
+    Entity,
+    Journal,
+    JournalItem,
+    Property,
+    RentPayment,
+    RentPaymentRollup,
+    RentSchedule,
+    Transaction,
+)
+
+
+class BalancePostingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("posting", password="pass")
+        self.account = Account.objects.create(user=self.user, name="Bank", type="bank")
+
+    def test_stale_instances_do_not_lose_updates(self):
+        first = Account.objects.get(pk=self.account.pk)
+        second = Account.objects.get(pk=self.account.pk)
+
+        for instance in (first, second):
+            instance.update_balance(
+                Transaction(account=instance, type="debit", amount=Decimal("10.00"))
+            )
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal("20.00"))
+
+    def test_posting_only_writes_the_balance_column(self):
+        stale = Account.objects.get(pk=self.account.pk)
+        Account.objects.filter(pk=self.account.pk).update(name="Renamed")
+
+        stale.update_balance(
+            Transaction(account=stale, type="credit", amount=Decimal("4.00"))
+        )
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.name, "Renamed")
+        self.assertEqual(self.account.balance, Decimal("-4.00"))
+
+
+class BalanceCheckpointTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("checkpoint", password="pass")
+        self.account = Account.objects.create(
+            user=self.user, name="Bank", type="bank", initial_balance=Decimal("100.00")
+        )
+
+    def post(self, day, amount, type="debit"):
+        transaction = Transaction.objects.create(
+            user=self.user, account=self.account, date=day, amount=amount, type=type
+        )
+        self.account.update_balance(transaction)
+
+    def test_balance_as_of_matches_with_and_without_checkpoint(self):
+        self.post(date(2025, 1, 10), Decimal("50.00"))
+        self.post(date(2025, 2, 5), Decimal("20.00"), type="credit")
+        self.post(date(2025, 3, 1), Decimal("5.00"))
+
+        expected = {
+            date(2025, 1, 31): Decimal("150.00"),
+            date(2025, 2, 28): Decimal("130.00"),
+            date(2025, 3, 15): Decimal("135.00"),
+        }
+        for as_of, balance in expected.items():
+            self.assertEqual(self.account.balance_as_of(as_of), balance)
+
+        AccountBalanceCheckpoint.objects.create(
+            account=self.account, period_end=date(2025, 1, 31), balance=Decimal("150.00")
+        )
+        for as_of, balance in expected.items():
+            self.assertEqual(self.account.balance_as_of(as_of), balance)
+
+    def test_backdated_posting_moves_later_checkpoints(self):
+        january = AccountBalanceCheckpoint.objects.create(
+            account=self.account, period_end=date(2025, 1, 31), balance=Decimal("100.00")
+        )
+        february = AccountBalanceCheckpoint.objects.create(
+            account=self.account, period_end=date(2025, 2, 28), balance=Decimal("100.00")
+        )
+
+        self.post(date(2025, 2, 10), Decimal("25.00"))
+
+        january.refresh_from_db()
+        february.refresh_from_db()
+        self.assertEqual(january.balance, Decimal("100.00"))
+        self.assertEqual(february.balance, Decimal("125.00"))
+        self.assertEqual(self.account.balance_as_of(date(2025, 3, 1)), Decimal("125.00"))
+
+
+class AuditBalanceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("audit", password="pass")
+        self.property = Property.objects.create(
+            user=self.user, name="Main", address="1 Main St"
+        )
+        self.bank = Account.objects.create(
+            user=self.user,
+            name="Bank",
+            type="bank",
+            balance=Decimal("10.00"),
+            initial_balance=Decimal("10.00"),
+        )
+        self.revenue = Account.objects.create(
+            user=self.user, name="Revenue", type="revenue"
+        )
+        self.property.accounts.add(self.bank, self.revenue)
+
+    def test_audit_matches_posted_balances(self):
+        for i in range(5):
+            transaction = Transaction.objects.create(
+                user=self.user,
+                account=self.bank,
+                date=date(2025, 1, 1 + i),
+                amount=Decimal("12.50"),
+                type="debit" if i % 2 else "credit",
+            )
+            self.bank.update_balance(transaction)
+
+            journal = Journal.objects.create(
+                user=self.user, property=self.property, date=date(2025, 2, 1 + i)
+            )
+            for account, type in ((self.bank, "debit"), (self.revenue, "credit")):
+                item = JournalItem.objects.create(
+                    user=self.user,
+                    journal=journal,
+                    account=account,
+                    type=type,
+                    amount=Decimal("3.00"),
+                )
+                account.update_balance(item)
+
+            rent_payment = RentPayment.objects.create(
+                user=self.user,
+                property=self.property,
+                amount=Decimal("100.00"),
+                date=date(2025, 3, 1 + i),
+                status="paid" if i < 3 else "due",
+            )
+            if rent_payment.status == "paid":
+                self.revenue.update_balance(rent_payment)
+
+        # Deleted payments are off the ledger even when they were paid
+        RentPayment.objects.create(
+            user=self.user,
+            property=self.property,
+            amount=Decimal("100.00"),
+            date=date(2025, 3, 10),
+            status="paid",
+            is_deleted=True,
+        )
+
+        for account in (self.bank, self.revenue):
+            account.refresh_from_db()
+            with self.assertNumQueries(1):
+                self.assertEqual(account.audit_balance(), account.balance)
+
+    def test_audit_balances_command_reports_and_repairs_drift(self):
+        transaction = Transaction.objects.create(
+            user=self.user,
+            account=self.bank,
+            date=date(2025, 1, 1),
+            amount=Decimal("40.00"),
+            type="debit",
+        )
+        self.bank.update_balance(transaction)
+        Account.objects.filter(pk=self.bank.pk).update(balance=Decimal("0.00"))
+
+        def audit(*args):
+            output = StringIO()
+            call_command("audit_balances", "--workers", "1", *args, stdout=output)
+            return json.loads(output.getvalue())
+
+        report = audit("--repair")
+        self.assertEqual(report["accounts_audited"], 2)
+        self.assertEqual(report["accounts_repaired"], 1)
+        self.assertEqual(report["drift"][0]["account_id"], self.bank.pk)
+        self.assertEqual(report["drift"][0]["expected"], "50.00")
+
+        self.bank.refresh_from_db()
+        self.assertEqual(self.bank.balance, Decimal("50.00"))
+        self.assertEqual(audit()["accounts_drifted"], 0)
+
+    def test_sharded_audit_matches_a_single_pass(self):
+        accounts = [self.bank, self.revenue] + [
+            Account.objects.create(user=self.user, name=f"Account {i}", type="bank")
+            for i in range(3)
+        ]
+        # Drift on the first and last shards
+        for account in (self.bank, accounts[-1]):
+            Account.objects.filter(pk=account.pk).update(balance=Decimal("1.00"))
+
+        account_ids = [account.pk for account in accounts]
+        shards = shard_ids(account_ids, 2)
+        self.assertEqual(shards, [account_ids[:2], account_ids[2:4], account_ids[4:]])
+
+        report = merge_results([audit_shard(shard) for shard in shards])
+        single = audit_shard(account_ids)
+        self.assertEqual(report["accounts_audited"], 5)
+        self.assertEqual(report["accounts_drifted"], 2)
+        self.assertEqual(report["accounts_repaired"], 0)
+        self.assertEqual(report["drift"], single["drift"])
+        self.assertEqual(
+            [row["account_id"] for row in report["drift"]],
+            [self.bank.pk, accounts[-1].pk],
+        )
+
+
+class ParallelAuditTests(TransactionTestCase):
+    """
+    Runs the audit across forked worker processes, which only see committed
+    rows, hence the TransactionTestCase.
+    """
+
+    def setUp(self):
+        user = User.objects.create_user("parallel", password="pass")
+        self.accounts = [
+            Account.objects.create(user=user, name=f"Account {i}", type="bank")
+            for i in range(4)
+        ]
+        Account.objects.filter(pk=self.accounts[2].pk).update(balance=Decimal("5.00"))
+
+    def test_workers_report_every_shard(self):
+        output = StringIO()
+        call_command(
+            "audit_balances", "--workers", "2", "--shard-size", "1", stdout=output
+        )
+        report = json.loads(output.getvalue())
+
+        self.assertEqual(report["shards"], 4)
+        self.assertEqual(report["accounts_audited"], 4)
+        self.assertEqual(
+            [row["account_id"] for row in report["drift"]], [self.accounts[2].pk]
+        )
+
+
+class RentStatusSweepTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("sweep", password="pass")
+        self.property = Property.objects.create(
+            user=self.user, name="Main", address="1 Main St"
+        )
+
+    def create_payment(self, day, status, **kwargs):
+        return RentPayment.objects.create(
+            user=self.user,
+            property=self.property,
+            amount=Decimal("500.00"),
+            date=day,
+            status=status,
+            **kwargs,
+        )
+
+    def test_sweep_moves_statuses_and_rollups(self):
+        stale = self.create_payment(date(2025, 3, 1), "scheduled")
+        late = self.create_payment(date(2025, 3, 5), "due")
+        grace = self.create_payment(date(2025, 3, 8), "due")
+        today = self.create_payment(date(2025, 3, 10), "scheduled")
+        future = self.create_payment(date(2025, 3, 20), "scheduled")
+        paid = self.create_payment(date(2025, 3, 1), "paid")
+        deleted = self.create_payment(date(2025, 3, 1), "scheduled", is_deleted=True)
+        RentPaymentRollup.rebuild()
+
+        output = StringIO()
+        call_command(
+            "sweep_rent_statuses",
+            "--date",
+            "2025-03-10",
+            "--grace-days",
+            "3",
+            "--batch-size",
+            "1",
+            stdout=output,
+        )
+        self.assertIn(
+            f"Property {self.property.id}: 1 due, 2 overdue.", output.getvalue()
+        )
+
+        expected = {
+            stale: "overdue",
+            late: "overdue",
+            grace: "due",
+            today: "due",
+            future: "scheduled",
+            paid: "paid",
+            deleted: "scheduled",
+        }
+        for rent_payment, status in expected.items():
+            rent_payment.refresh_from_db()
+            self.assertEqual(rent_payment.status, status)
+
+        rollups = dict(
+            RentPaymentRollup.objects.filter(property=self.property).values_list(
+                "status", "count"
+            )
+        )
+        self.assertEqual(rollups, {"scheduled": 1, "due": 2, "overdue": 2, "paid": 1})
+
+        self.assertEqual(RentPayment.sweep_statuses(date(2025, 3, 10), grace_days=3), {})
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class ConcurrentBalancePostingTests(TransactionTestCase):
+    """
+    Posts from many threads at once against the same accounts. Needs a
+    database with row locking and concurrent writers, such as PostgreSQL.
+    """
+
+    THREADS = 8
+    POSTINGS_PER_THREAD = 50
+
+    def setUp(self):
+        self.user = User.objects.create_user("contention", password="pass")
+        self.accounts = [
+            Account.objects.create(user=self.user, name=f"Account {i}", type="bank")
+            for i in range(3)
+        ]
+
+    def post_from_thread(self, errors):
+        try:
+            for _ in range(self.POSTINGS_PER_THREAD):
+                # Touch the accounts in a random order to invite deadlocks
+                deltas = {
+                    (account.pk, date.today(), None): Decimal("1.00")
+                    for account in random.sample(self.accounts, len(self.accounts))
+                }
+                Account.apply_balance_deltas(deltas)
+                self.accounts[0].update_balance(
+                    Transaction(type="debit", amount=Decimal("1.00"), date=date.today())
+                )
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    def test_no_balance_drift_under_contention(self):
+        errors = []
+        threads = [
+            threading.Thread(target=self.post_from_thread, args=(errors,))
+            for _ in range(self.THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+
+        postings = self.THREADS * self.POSTINGS_PER_THREAD
+        balances = [
+            Account.objects.get(pk=account.pk).balance for account in self.accounts
+        ]
+        self.assertEqual(balances[0], Decimal(postings * 2))
+        self.assertEqual(balances[1:], [Decimal(postings)] * 2)
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class ConcurrentRentGenerationTests(TransactionTestCase):
+    """
+    Generates rent payments from two threads at once over the same schedules.
+    Needs a database with row locking and concurrent writers.
+    """
+
+    def setUp(self):
+        user = User.objects.create_user("generation", password="pass")
+        self.property = Property.objects.create(
+            user=user, name="Main", address="1 Main St"
+        )
+        entity = Entity.objects.create(user=user, property=self.property, name="Tenant")
+        for day in (1, 15, 31):
+            RentSchedule.objects.create(
+                user=user,
+                property=self.property,
+                entity=entity,
+                amount=Decimal("500.00"),
+                day_of_month=day,
+                start_date=date(2025, 1, 1),
+            )
+
+    def generate_from_thread(self, barrier, created, errors):
+        try:
+            barrier.wait()
+            created.append(
+                RentSchedule.generate_payments(
+                    months=3, today=date(2025, 1, 10), batch_size=2
+                )
+            )
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    def test_concurrent_runs_create_each_payment_once(self):
+        barrier = threading.Barrier(2)
+        created = []
+        errors = []
+        threads = [
+            threading.Thread(
+                target=self.generate_from_thread, args=(barrier, created, errors)
+            )
+            for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            sum(counts.get(self.property.pk, 0) for counts in created), 9
+        )
+        self.assertEqual(self.property.rent_payments.count(), 9)
+        self.assertEqual(
+            RentPaymentRollup.objects.get(
+                property=self.property, month=date(2025, 2, 1), status="scheduled"
+            ).total_amount,
+            Decimal("1500.00"),
+        )
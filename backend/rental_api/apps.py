@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class RentalApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'rental_api'
+
+    def ready(self):
+        from core_backend.signals import balances_changed
+
+        from . import cache
+
+        balances_changed.connect(
+            cache.invalidate_balances, dispatch_uid="list_cache_invalidate_balances"
+        )
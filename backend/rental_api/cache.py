@@ -0,0 +1,149 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+# Scopes of cached list responses and the id each one is invalidated by
+ACCOUNTS = "accounts"  # per user, accounts are shared between properties
+ENTITIES = "entities"  # per property
+PROPERTIES = "properties"  # per user
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _cache():
+    return caches[getattr(settings, "LIST_CACHE_ALIAS", "default")]
+
+
+def _count(scope, outcome):
+    with _stats_lock:
+        _stats[(scope, outcome)] += 1
+
+
+def _generation_key(scope, owner_id):
+    return f"list-cache:{scope}:{owner_id}:generation"
+
+
+def _generation(cache, scope, owner_id):
+    """
+    Current generation of a scope, which is part of every key cached in it.
+    A generation evicted from the cache restarts at the current time, never
+    at a value older entries were stored under.
+    """
+    key = _generation_key(scope, owner_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, time.time_ns(), None)
+        generation = cache.get(key)
+    return generation
+
+
+def _bump_generations(scope, owner_ids):
+    cache = _cache()
+    for owner_id in owner_ids:
+        key = _generation_key(scope, owner_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+def invalidate(scope, *owner_ids):
+    """
+    Moves the generation of each owner's scope on once the current database
+    transaction commits, so every response cached for it is missed from then
+    on and left for the cache to evict. Waiting for the commit keeps readers
+    from caching the data the write is about to replace under the new keys.
+    """
+    owner_ids = {owner_id for owner_id in owner_ids if owner_id is not None}
+    if owner_ids:
+        transaction.on_commit(lambda: _bump_generations(scope, owner_ids))
+
+
+def invalidate_accounts(user_id):
+    """
+    Invalidates a user's account lists and the property lists, which nest
+    the accounts, after account or balance changes.
+    """
+    invalidate(ACCOUNTS, user_id)
+    invalidate(PROPERTIES, user_id)
+
+
+def invalidate_balances(sender, user_ids, **kwargs):
+    """
+    Receiver of core_backend's balances_changed signal, connected in
+    RentalApiConfig.ready(), so every balance write invalidates once.
+    """
+    for user_id in user_ids:
+        invalidate_accounts(user_id)
+
+
+def generation(scope, owner_id):
+    """
+    Version of an owner's scope that moves on with every invalidation, for
+    responses that depend on more than one property's data.
+    """
+    return _generation(_cache(), scope, owner_id)
+
+
+def cached_list(request, scope, owner_id, build, property_obj=None):
+    """
+    Returns the response data of a list endpoint from the cache, keyed by
+    user, property and query params, or builds and caches it on a miss.
+    """
+    cache = _cache()
+
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+    )
+    params_hash = hashlib.sha1(repr(params).encode()).hexdigest()
+    key = ":".join(
+        str(part)
+        for part in (
+            "list-cache",
+            scope,
+            owner_id,
+            _generation(cache, scope, owner_id),
+            request.user.pk,
+            property_obj.pk if property_obj else "",
+            params_hash,
+        )
+    )
+
+    data = cache.get(key)
+    if data is not None:
+        _count(scope, "hits")
+        return data
+
+    _count(scope, "misses")
+    data = list(build())
+    cache.set(key, data, getattr(settings, "LIST_CACHE_TIMEOUT", 300))
+    return data
+
+
+def stats():
+    """
+    Hit and miss counts of this process per scope.
+    """
+    with _stats_lock:
+        counts = dict(_stats)
+
+    return {
+        scope: {
+            "hits": counts.get((scope, "hits"), 0),
+            "misses": counts.get((scope, "misses"), 0),
+        }
+        for scope in (ACCOUNTS, ENTITIES, PROPERTIES)
+    }
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
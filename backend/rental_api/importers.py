@@ -0,0 +1,345 @@
+import codecs
+import csv
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import DatabaseError, transaction
+from rest_framework import serializers
+
+from core_backend.models import Entity, Property
+from .serializers import TransactionSerializer
+
+DEFAULT_CHUNK_SIZE = 500
+
+# Maps Transaction fields to the CSV header that holds them.
+DEFAULT_COLUMN_MAP = {
+    "date": "date",
+    "amount": "amount",
+    "type": "type",
+    "payee": "payee",
+    "memo": "memo",
+}
+
+CSV_DATE_FORMATS = ["%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y", "%d-%b-%Y"]
+
+
+class StatementParseError(ValueError):
+    pass
+
+
+class StatementReadError(StatementParseError):
+    """
+    The file cannot be read past a row, such as on bytes that do not decode
+    or malformed CSV quoting.
+    """
+
+
+def _parse_amount(value):
+    cleaned = (value or "").strip().replace("$", "").replace(",", "")
+    is_negative = cleaned.startswith("(") and cleaned.endswith(")")
+    cleaned = cleaned.strip("()")
+
+    try:
+        amount = Decimal(cleaned)
+    except InvalidOperation:
+        raise StatementParseError(f"Invalid amount '{value}'.")
+
+    return -amount if is_negative else amount
+
+
+def _parse_csv_date(value):
+    value = (value or "").strip()
+    for date_format in CSV_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise StatementParseError(f"Invalid date '{value}'.")
+
+
+def _parse_ofx_date(value):
+    # OFX dates look like YYYYMMDD[HHMMSS[.XXX]][[TZ]]
+    try:
+        return datetime.strptime(value[:8], "%Y%m%d").date()
+    except ValueError:
+        raise StatementParseError(f"Invalid date '{value}'.")
+
+
+def _statement_line(date_value, amount, payee, memo, type_value=None):
+    """
+    Builds a statement line. Positive amounts are debits to the imported
+    account and negative amounts are credits, unless the file names the type.
+    """
+    if type_value:
+        type_value = type_value.strip().lower()
+        if type_value not in ("debit", "credit"):
+            raise StatementParseError(f"Invalid type '{type_value}'.")
+    else:
+        type_value = "debit" if amount >= 0 else "credit"
+
+    return {
+        "date": date_value,
+        "amount": abs(amount),
+        "type": type_value,
+        "payee": (payee or "").strip(),
+        "memo": (memo or "").strip(),
+    }
+
+
+def iter_csv_lines(file, column_map=None, encoding="utf-8-sig"):
+    """
+    Yields (row_number, line) pairs from a CSV statement, reading one line at
+    a time. Rows that cannot be parsed yield a StatementParseError as the line.
+    """
+    column_map = {**DEFAULT_COLUMN_MAP, **(column_map or {})}
+    reader = csv.DictReader(codecs.iterdecode(file, encoding))
+    rows = iter(reader)
+
+    while True:
+        try:
+            row = next(rows)
+        except StopIteration:
+            return
+        except (UnicodeDecodeError, csv.Error) as e:
+            yield reader.line_num + 1, StatementReadError(
+                f"Could not read the file past line {reader.line_num}: {e}"
+            )
+            return
+
+        try:
+            line = _statement_line(
+                _parse_csv_date(row.get(column_map["date"])),
+                _parse_amount(row.get(column_map["amount"])),
+                row.get(column_map["payee"]),
+                row.get(column_map["memo"]),
+                row.get(column_map["type"]),
+            )
+        except StatementParseError as e:
+            line = e
+        yield reader.line_num, line
+
+
+def _iter_ofx_tags(file, encoding):
+    """
+    Yields (tag, value) pairs from OFX/QFX content. Handles both SGML files,
+    where leaf tags are not closed, and XML files, across chunk boundaries.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    buffer = ""
+
+    for chunk in file.chunks():
+        buffer += decoder.decode(chunk)
+        parts = buffer.split("<")
+        buffer = parts.pop()
+
+        for part in parts:
+            if ">" not in part:
+                continue
+            tag, _, value = part.partition(">")
+            yield tag.strip().upper(), value.strip()
+
+    if ">" in buffer:
+        tag, _, value = buffer.partition(">")
+        yield tag.strip().upper(), value.strip()
+
+
+def iter_ofx_lines(file, encoding="latin-1"):
+    """
+    Yields (row_number, line) pairs, one per STMTTRN block of an OFX or QFX
+    statement, without loading the document into memory.
+    """
+    row_number = 0
+    current = None
+
+    for tag, value in _iter_ofx_tags(file, encoding):
+        if tag == "STMTTRN":
+            current = {}
+        elif tag == "/STMTTRN" and current is not None:
+            row_number += 1
+            try:
+                line = _statement_line(
+                    _parse_ofx_date(current.get("DTPOSTED", "")),
+                    _parse_amount(current.get("TRNAMT")),
+                    current.get("NAME") or current.get("PAYEE"),
+                    current.get("MEMO"),
+                )
+            except StatementParseError as e:
+                line = e
+            yield row_number, line
+            current = None
+        elif current is not None and not tag.startswith("/"):
+            current[tag] = value
+
+
+def validate_column_map(column_map):
+    """
+    Checks a CSV column map up front, as parsing only starts once the import
+    response is streaming.
+    """
+    if not isinstance(column_map, dict):
+        raise StatementParseError("column_map must be an object.")
+
+    for field, header in column_map.items():
+        if field not in DEFAULT_COLUMN_MAP:
+            raise StatementParseError(f"Unknown column_map field '{field}'.")
+        if not isinstance(header, str):
+            raise StatementParseError(f"column_map header for '{field}' must be text.")
+    return column_map
+
+
+def iter_statement_lines(file, file_format, column_map=None):
+    if column_map is not None:
+        validate_column_map(column_map)
+
+    if file_format == "csv":
+        return iter_csv_lines(file, column_map=column_map)
+    if file_format in ("ofx", "qfx"):
+        return iter_ofx_lines(file)
+    raise StatementParseError(f"Unsupported statement format '{file_format}'.")
+
+
+class StatementImporter:
+    """
+    Loads parsed statement lines into an account as transactions, committing
+    every chunk_size valid rows in its own database transaction so a bad row or
+    chunk never rolls back work that was already committed.
+    """
+
+    def __init__(
+        self,
+        request,
+        property_obj,
+        account,
+        default_entity=None,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+    ):
+        self.request = request
+        self.property_obj = property_obj
+        self.account = account
+        self.default_entity = default_entity
+        self.chunk_size = chunk_size
+
+        # Payees are matched to the property's entities by name
+        self.entities_by_name = {
+            name.strip().lower(): entity_id
+            for entity_id, name in Entity.objects.filter(
+                user=request.user, property=property_obj
+            ).values_list("id", "name")
+        }
+
+        self.rows_processed = 0
+        self.imported = 0
+        self.failed = 0
+        self.chunks_committed = 0
+
+    def _build_row(self, line):
+        entity_id = self.entities_by_name.get(line["payee"].lower())
+        if entity_id is None and self.default_entity is not None:
+            entity_id = self.default_entity.id
+        if entity_id is None:
+            raise StatementParseError(
+                f"No entity matches payee '{line['payee']}' and no default entity was given."
+            )
+
+        memo = line["memo"]
+        if not memo and line["payee"]:
+            memo = line["payee"]
+
+        return {
+            "account_id": self.account.id,
+            "entity_id": entity_id,
+            "date": line["date"],
+            "amount": line["amount"],
+            "type": line["type"],
+            "memo": memo,
+        }
+
+    def _commit(self, chunk):
+        rows = [row for _, row in chunk]
+        list_serializer = TransactionSerializer(
+            many=True, context={"request": self.request}
+        )
+
+        try:
+            with transaction.atomic():
+                list_serializer.create(
+                    [
+                        {**row, "user": self.request.user, "property": self.property_obj}
+                        for row in rows
+                    ]
+                )
+                Property.bump_data_version([self.property_obj.id], [self.account.id])
+        except (serializers.ValidationError, DatabaseError) as e:
+            self.failed += len(chunk)
+            detail = getattr(e, "detail", str(e))
+            return [{"row": row_number, "errors": detail} for row_number, _ in chunk]
+
+        self.imported += len(chunk)
+        self.chunks_committed += 1
+        return []
+
+    def _progress(self, errors):
+        return {
+            "event": "progress",
+            "rows_processed": self.rows_processed,
+            "imported": self.imported,
+            "failed": self.failed,
+            "chunks_committed": self.chunks_committed,
+            "errors": errors,
+        }
+
+    def run(self, lines):
+        """
+        Consumes (row_number, line) pairs and yields a progress event after
+        every committed chunk, an error event if the file could not be read to
+        the end, and a final summary event.
+        """
+        chunk = []
+        errors = []
+        read_error = None
+
+        for row_number, line in lines:
+            if isinstance(line, StatementReadError):
+                # Rows read before the error are still imported
+                read_error = {"event": "error", "row": row_number, "error": str(line)}
+                break
+
+            self.rows_processed += 1
+
+            try:
+                if isinstance(line, Exception):
+                    raise line
+                row = self._build_row(line)
+            except StatementParseError as e:
+                self.failed += 1
+                errors.append({"row": row_number, "errors": str(e)})
+                continue
+
+            serializer = TransactionSerializer(data=row)
+            if not serializer.is_valid():
+                self.failed += 1
+                errors.append({"row": row_number, "errors": serializer.errors})
+                continue
+
+            chunk.append((row_number, serializer.validated_data))
+
+            if len(chunk) >= self.chunk_size:
+                errors.extend(self._commit(chunk))
+                yield self._progress(errors)
+                chunk = []
+                errors = []
+
+        if chunk:
+            errors.extend(self._commit(chunk))
+        if chunk or errors:
+            yield self._progress(errors)
+        if read_error:
+            yield read_error
+
+        yield {
+            "event": "complete",
+            "rows_processed": self.rows_processed,
+            "imported": self.imported,
+            "failed": self.failed,
+            "chunks_committed": self.chunks_committed,
+        }
@@ -1,10 +1,67 @@
+from datetime import date
+
+from django.utils.cache import patch_cache_control
 from rest_framework.response import Response
 from rest_framework.request import Request
 from rest_framework import status
 from core_backend.models import Property
 
 
-class PropertyRequiredMixin:
+class NotModified(Exception):
+    pass
+
+
+class ConditionalGetMixin:
+    """
+    Tags GET responses with an ETag built from the property's data version
+    and answers a matching If-None-Match with 304 Not Modified before the
+    handler runs. The property comes from get_etag_property(), which views
+    without PropertyRequiredMixin override, and get_etag_version() can add
+    to its version what else a response depends on.
+    """
+
+    def get_etag_property(self, request, *args, **kwargs):
+        return getattr(self, "property_obj", None)
+
+    def get_etag_version(self, request, property_obj):
+        return property_obj.data_version
+
+    def initial(self, request, *args, **kwargs):
+        self.etag = None
+        super().initial(request, *args, **kwargs)
+
+        if request.method != "GET":
+            return
+
+        property_obj = self.get_etag_property(request, *args, **kwargs)
+        if property_obj is None:
+            return
+
+        # Some responses depend on today's date, so tags also expire daily
+        version = self.get_etag_version(request, property_obj)
+        self.etag = f'"{property_obj.pk}-{version}-{date.today().isoformat()}"'
+
+        if_none_match = request.headers.get("If-None-Match", "")
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if self.etag in tags or "*" in tags:
+            raise NotModified()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        if getattr(self, "etag", None) and response.status_code in (200, 304):
+            response["ETag"] = self.etag
+            # Lets browsers keep the response but revalidate it on every use
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class PropertyRequiredMixin(ConditionalGetMixin):
 
     def initial(self, request, *args, **kwargs):
         if request.method in ["GET", "POST"]:
@@ -35,3 +92,24 @@ class PropertyRequiredMixin:
                 )
 
         super().initial(request, *args, **kwargs)
+
+
+class ClosedPeriodMixin:
+
+    def closed_period_response(self, property_obj, *dates):
+        """
+        Returns an error response when any of the dates falls in a closed
+        period of the property, None when the edit may go ahead.
+        """
+        closed_through = property_obj.closed_through() if property_obj else None
+        if closed_through is None:
+            return None
+
+        if any(day is not None and day <= closed_through for day in dates):
+            return Response(
+                {
+                    "error": f"The books for this property are closed through {closed_through}."
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
+        return None
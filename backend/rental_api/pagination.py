@@ -0,0 +1,126 @@
+import base64
+from datetime import date
+
+from django.db.models import Q
+from rest_framework.exceptions import ParseError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination ordered by (date, id). Each page seeks past the last row
+    of the previous page instead of using OFFSET, so every page costs the same.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    default_page_size = 100
+    max_page_size = 1000
+
+    def is_requested(self, request):
+        """
+        Pagination is opt-in so existing clients keep receiving full lists.
+        """
+        return (
+            self.cursor_query_param in request.query_params
+            or self.page_size_query_param in request.query_params
+        )
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(
+                request.query_params.get(
+                    self.page_size_query_param, self.default_page_size
+                )
+            )
+        except ValueError:
+            raise ParseError({"error": "Invalid page_size provided."})
+
+        if page_size < 1:
+            raise ParseError({"error": "page_size must be at least 1."})
+        return min(page_size, self.max_page_size)
+
+    def encode_cursor(self, row):
+        raw = f"{row.date.isoformat()}|{row.pk}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            date_str, pk = raw.split("|")
+            return date.fromisoformat(date_str), int(pk)
+        except (ValueError, UnicodeDecodeError):
+            raise ParseError({"error": "Invalid cursor provided."})
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+
+        # Undated rows have no position in the (date, id) ordering
+        queryset = queryset.filter(date__isnull=False).order_by("date", "pk")
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            cursor_date, cursor_pk = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(date__gt=cursor_date) | Q(date=cursor_date, pk__gt=cursor_pk)
+            )
+
+        # One extra row tells whether another page exists
+        rows = list(queryset[: self.page_size + 1])
+        has_next = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+
+        self.next_cursor = self.encode_cursor(rows[-1]) if has_next else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "results": data,
+                "next_cursor": self.next_cursor,
+                "page_size": self.page_size,
+            }
+        )
+
+
+class RegisterPagination(KeysetPagination):
+    """
+    Keyset pagination over an AccountRegister, ordered by (date, source, id).
+    Register pages are always paginated and carry their opening balance.
+    """
+
+    def encode_cursor(self, row):
+        raw = f"{row['date'].isoformat()}|{row['source']}|{row['id']}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            date_str, source, pk = raw.split("|")
+            return date.fromisoformat(date_str), source, int(pk)
+        except (ValueError, UnicodeDecodeError):
+            raise ParseError({"error": "Invalid cursor provided."})
+
+    def paginate_register(self, register, request):
+        self.page_size = self.get_page_size(request)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        after = self.decode_cursor(cursor) if cursor else None
+
+        # One extra row tells whether another page exists
+        rows = register.rows(after=after, limit=self.page_size + 1)
+        has_next = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+
+        self.opening_balance = register.opening_balance(after)
+        for row in rows:
+            row["running_balance"] = self.opening_balance + row.pop("running_change")
+
+        self.next_cursor = self.encode_cursor(rows[-1]) if has_next else None
+        return rows
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data["opening_balance"] = str(self.opening_balance)
+        return response
@@ -0,0 +1,157 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection
+
+from core_backend.models import Journal, JournalItem, Property, RentPayment, Transaction
+
+CENT = Decimal("0.01")
+
+# Register columns, in the order every branch of the entries union selects them
+REGISTER_COLUMNS = ("source", "id", "date", "type", "amount", "memo")
+
+
+class RegisterError(ValueError):
+    pass
+
+
+def _to_decimal(value):
+    # SQLite sums decimals as floats, PostgreSQL returns Decimal
+    return Decimal(str(value or 0)).quantize(CENT)
+
+
+def _to_date(value):
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+class AccountRegister:
+    """
+    The postings of one account, transactions, journal items and paid rent
+    for revenue accounts, merged in (date, source, id) order. Each page's
+    running balance is a window SUM() OVER the page, seeded with the balance
+    of everything before it.
+    """
+
+    def __init__(self, account):
+        if account.normal_balance == "na":
+            raise RegisterError("Account has no normal balance to report.")
+        self.account = account
+
+    def _ledger_sql(self):
+        """
+        SQL selecting every dated posting of the account with its signed
+        change to the balance, and its params.
+        """
+        quote = connection.ops.quote_name
+        tables = {
+            "transaction": quote(Transaction._meta.db_table),
+            "journal_item": quote(JournalItem._meta.db_table),
+            "journal": quote(Journal._meta.db_table),
+            "rent_payment": quote(RentPayment._meta.db_table),
+            "property_accounts": quote(Property.accounts.through._meta.db_table),
+        }
+        account_id = self.account.pk
+
+        branches = [
+            f"""
+            SELECT 'journal_item' AS source, ji.id, j.date, ji.type, ji.amount, ji.memo
+            FROM {tables["journal_item"]} ji
+            JOIN {tables["journal"]} j ON j.id = ji.journal_id
+            WHERE ji.account_id = %s AND j.date IS NOT NULL
+            """,
+            f"""
+            SELECT 'transaction', t.id, t.date, t.type, t.amount, t.memo
+            FROM {tables["transaction"]} t
+            WHERE t.account_id = %s AND t.date IS NOT NULL
+            """,
+        ]
+        params = [account_id, account_id]
+
+        # Paid rent credits every revenue account of its property
+        if self.account.type == "revenue":
+            branches.append(
+                f"""
+                SELECT 'rent_payment', rp.id, rp.date, 'credit', rp.amount, NULL
+                FROM {tables["rent_payment"]} rp
+                JOIN {tables["property_accounts"]} pa ON pa.property_id = rp.property_id
+                WHERE pa.account_id = %s AND rp.status = 'paid' AND rp.date IS NOT NULL
+                    AND rp.is_deleted = %s
+                """
+            )
+            params += [account_id, False]
+
+        sql = f"""
+            SELECT entries.*,
+                CASE WHEN source = 'rent_payment' OR type = %s
+                    THEN amount ELSE -amount END AS change
+            FROM ({" UNION ALL ".join(branches)}) entries
+        """
+        return sql, [self.account.normal_balance, *params]
+
+    def rows(self, after=None, limit=100):
+        """
+        Up to limit register rows after the (date, source, id) key, each with
+        its change and running_change, the window sum of changes on the page.
+        """
+        ledger_sql, params = self._ledger_sql()
+
+        where = ""
+        if after is not None:
+            after_date, after_source, after_id = after
+            where = """
+                WHERE date > %s
+                    OR (date = %s AND (source > %s OR (source = %s AND id > %s)))
+            """
+            params += [after_date, after_date, after_source, after_source, after_id]
+
+        columns = ", ".join(REGISTER_COLUMNS)
+        sql = f"""
+            SELECT {columns}, change,
+                SUM(change) OVER (ORDER BY date, source, id) AS running_change
+            FROM (
+                SELECT * FROM ({ledger_sql}) ledger
+                {where}
+                ORDER BY date, source, id
+                LIMIT %s
+            ) page
+            ORDER BY date, source, id
+        """
+        params.append(limit)
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+
+        return [
+            {
+                **dict(zip(REGISTER_COLUMNS, row)),
+                "date": _to_date(row[2]),
+                "amount": _to_decimal(row[4]),
+                "change": _to_decimal(row[6]),
+                "running_change": _to_decimal(row[7]),
+            }
+            for row in rows
+        ]
+
+    def opening_balance(self, after=None):
+        """
+        Balance after the (date, source, id) key, the initial balance without
+        one. Earlier days come from the account's checkpoints, so only the
+        postings on the key's own date are summed here.
+        """
+        if after is None:
+            return self.account.initial_balance
+
+        after_date, after_source, after_id = after
+        ledger_sql, params = self._ledger_sql()
+        sql = f"""
+            SELECT SUM(change) FROM ({ledger_sql}) ledger
+            WHERE date = %s AND (source < %s OR (source = %s AND id <= %s))
+        """
+        params += [after_date, after_source, after_source, after_id]
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            same_day = _to_decimal(cursor.fetchone()[0])
+
+        return self.account.balance_as_of(after_date - timedelta(days=1)) + same_day
@@ -0,0 +1,566 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Max, OuterRef, Q, Subquery, Sum
+from django.utils import timezone
+
+from core_backend.models import (
+    REPORT_DATE_RANGE_CHOICES,
+    REPORT_TYPE_CHOICES,
+    Account,
+    AccountBalanceCheckpoint,
+    ClosingBalance,
+    JournalItem,
+    LedgerPosting,
+    PeriodClose,
+    RentPayment,
+    Transaction,
+    month_end,
+)
+
+ZERO = Decimal("0.00")
+
+# Statement sections and the account types that roll up into each.
+BALANCE_SHEET_SECTIONS = {
+    "assets": ["asset", "bank"],
+    "liabilities": ["liability", "credit-card"],
+    "equity": ["equity"],
+}
+PROFIT_LOSS_SECTIONS = {
+    "revenue": ["revenue"],
+    "expenses": ["expense"],
+}
+
+
+class ReportError(ValueError):
+    pass
+
+
+def resolve_report_range(range_type, start_date=None, end_date=None, today=None):
+    """
+    Turns a REPORT_DATE_RANGE_CHOICES key into a (start, end) date window. A
+    start of None means the window is open from the first posting.
+    """
+    today = today or date.today()
+
+    if range_type == "last_year":
+        return date(today.year - 1, 1, 1), date(today.year - 1, 12, 31)
+    if range_type == "year_to_date":
+        return date(today.year, 1, 1), today
+    if range_type == "all_time":
+        return None, today
+    if range_type == "custom":
+        if not start_date or not end_date:
+            raise ReportError("Custom reports require start_date and end_date.")
+        if start_date > end_date:
+            raise ReportError("start_date must be on or before end_date.")
+        return start_date, end_date
+
+    choices = ", ".join(key for key, _ in REPORT_DATE_RANGE_CHOICES)
+    raise ReportError(f"report_range_type must be one of: {choices}.")
+
+
+def _grouped_totals(queryset, date_field, start, end):
+    """
+    Sums a ledger queryset per account and posting type in one GROUP BY query.
+    """
+    if start is not None:
+        queryset = queryset.filter(**{f"{date_field}__gte": start})
+    if end is not None:
+        queryset = queryset.filter(**{f"{date_field}__lte": end})
+
+    return (
+        queryset.order_by()
+        .values("account_id")
+        .annotate(
+            debit=Sum("amount", filter=Q(type="debit"), default=ZERO),
+            credit=Sum("amount", filter=Q(type="credit"), default=ZERO),
+            total=Sum("amount", default=ZERO),
+        )
+    )
+
+
+def property_account_activity(property_obj, start=None, end=None):
+    """
+    Returns the accounts used by a property, each carrying the debit, credit,
+    untyped and paid rent totals that Account.net_activity() reads, for the
+    property's postings dated within [start, end], and an opening_balance.
+
+    Without a start, the latest period close on or before end seeds the
+    opening balances and only postings after it are scanned. Otherwise the
+    opening balance is the account's initial balance.
+    """
+    opening = {}
+    if start is None:
+        closes = property_obj.period_closes.order_by("-period_end")
+        if end is not None:
+            closes = closes.filter(period_end__lte=end)
+        period_close = closes.first()
+
+        if period_close:
+            start = period_close.period_end + timedelta(days=1)
+            opening = dict(
+                period_close.closing_balances.values_list("account_id", "balance")
+            )
+
+    totals = {}
+    for rows in (
+        _grouped_totals(
+            Transaction.objects.filter(property=property_obj), "date", start, end
+        ),
+        _grouped_totals(
+            JournalItem.objects.filter(journal__property=property_obj),
+            "journal__date",
+            start,
+            end,
+        ),
+    ):
+        for row in rows:
+            debit, credit, untyped = totals.get(row["account_id"], (ZERO, ZERO, ZERO))
+            totals[row["account_id"]] = (
+                debit + row["debit"],
+                credit + row["credit"],
+                untyped + row["total"] - row["debit"] - row["credit"],
+            )
+
+    rent_payments = RentPayment.objects.filter(
+        property=property_obj, status="paid", is_deleted=False
+    )
+    if start is not None:
+        rent_payments = rent_payments.filter(date__gte=start)
+    if end is not None:
+        rent_payments = rent_payments.filter(date__lte=end)
+    rent_total = rent_payments.aggregate(total=Sum("amount", default=ZERO))["total"]
+
+    accounts = (
+        Account.objects.filter(
+            Q(properties=property_obj) | Q(pk__in=totals.keys() | opening.keys()),
+            type__isnull=False,
+        )
+        .distinct()
+        .only("id", "name", "type", "initial_balance")
+        .order_by("type", "name", "pk")
+    )
+
+    for account in accounts:
+        debit, credit, untyped = totals.get(account.id, (ZERO, ZERO, ZERO))
+        account.debit_total = debit
+        account.credit_total = credit
+        account.untyped_total = untyped
+        account.rent_total = rent_total
+        account.opening_balance = opening.get(account.id, account.initial_balance)
+
+    return accounts
+
+
+def _section(accounts, types, amount_of):
+    lines = [
+        {
+            "id": account.id,
+            "name": account.name,
+            "type": account.type,
+            "amount": amount_of(account),
+        }
+        for account in accounts
+        if account.type in types
+    ]
+    return {"accounts": lines, "total": sum((line["amount"] for line in lines), ZERO)}
+
+
+def _totals_by_type(accounts, amount_of):
+    totals = {}
+    for account in accounts:
+        totals[account.type] = totals.get(account.type, ZERO) + amount_of(account)
+    return totals
+
+
+def balance_sheet(property_obj, end):
+    """
+    Balances of the property's asset, liability and equity accounts at the end
+    of a date, with revenue less expenses to date carried as net income.
+    """
+    accounts = [
+        account
+        for account in property_account_activity(property_obj, end=end)
+        if account.net_activity() is not None
+    ]
+
+    def balance(account):
+        return account.opening_balance + account.net_activity()
+
+    sections = {
+        name: _section(accounts, types, balance)
+        for name, types in BALANCE_SHEET_SECTIONS.items()
+    }
+    net_income = (
+        _section(accounts, PROFIT_LOSS_SECTIONS["revenue"], balance)["total"]
+        - _section(accounts, PROFIT_LOSS_SECTIONS["expenses"], balance)["total"]
+    )
+    sections["equity"]["net_income"] = net_income
+    sections["equity"]["total"] += net_income
+
+    return {
+        **sections,
+        "totals_by_type": _totals_by_type(accounts, balance),
+        "total_liabilities_and_equity": sections["liabilities"]["total"]
+        + sections["equity"]["total"],
+    }
+
+
+def profit_and_loss(property_obj, start, end):
+    """
+    Revenue and expense activity of the property within [start, end].
+    """
+    types = PROFIT_LOSS_SECTIONS["revenue"] + PROFIT_LOSS_SECTIONS["expenses"]
+    accounts = [
+        account
+        for account in property_account_activity(property_obj, start=start, end=end)
+        if account.type in types
+    ]
+
+    def activity(account):
+        # Opening balances only differ from initial ones when seeded by a close
+        opening = account.opening_balance - account.initial_balance
+        return opening + account.net_activity()
+
+    sections = {
+        name: _section(accounts, types, activity)
+        for name, types in PROFIT_LOSS_SECTIONS.items()
+    }
+    return {
+        **sections,
+        "totals_by_type": _totals_by_type(accounts, activity),
+        "net_income": sections["revenue"]["total"] - sections["expenses"]["total"],
+    }
+
+
+def run_report(property_obj, report_type, range_type, start_date=None, end_date=None):
+    start, end = resolve_report_range(range_type, start_date, end_date)
+    return _report_result(property_obj, report_type, range_type, start, end)
+
+
+def _report_result(property_obj, report_type, range_type, start, end):
+    if report_type == "balance_sheet":
+        result = balance_sheet(property_obj, end)
+    elif report_type == "profit_loss":
+        result = profit_and_loss(property_obj, start, end)
+    else:
+        choices = ", ".join(key for key, _ in REPORT_TYPE_CHOICES if key != "na")
+        raise ReportError(f"type must be one of: {choices}.")
+
+    return {
+        "type": report_type,
+        "report_range_type": range_type,
+        "start_date": start,
+        "end_date": end,
+        **result,
+    }
+
+
+def report_to_json(value):
+    """
+    Renders Decimal amounts as strings, matching the serializers' output.
+    """
+    if isinstance(value, dict):
+        return {key: report_to_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [report_to_json(item) for item in value]
+    if isinstance(value, Decimal):
+        return str(value.quantize(ZERO))
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+@transaction.atomic
+def close_period(property_obj, period_end, user=None):
+    """
+    Closes a property's books through period_end, a month end after the
+    latest close. Stores every account's closing balance, seeded from the
+    previous close, and checkpoints the accounts' overall balances at the
+    same date for as-of lookups.
+    """
+    if period_end != month_end(period_end):
+        raise ReportError("period_end must be the last day of a month.")
+    if period_end >= date.today():
+        raise ReportError("Only periods that have ended can be closed.")
+
+    closed_through = property_obj.closed_through()
+    if closed_through and period_end <= closed_through:
+        raise ReportError(f"Periods through {closed_through} are already closed.")
+
+    accounts = [
+        account
+        for account in property_account_activity(property_obj, end=period_end)
+        if account.net_activity() is not None
+    ]
+
+    period_close = PeriodClose.objects.create(
+        user=user, property=property_obj, period_end=period_end
+    )
+    ClosingBalance.objects.bulk_create(
+        [
+            ClosingBalance(
+                period_close=period_close,
+                account=account,
+                balance=account.opening_balance + account.net_activity(),
+            )
+            for account in accounts
+        ]
+    )
+    AccountBalanceCheckpoint.objects.bulk_create(
+        [
+            AccountBalanceCheckpoint(
+                account=account,
+                period_end=period_end,
+                balance=account.balance_as_of(period_end),
+            )
+            for account in accounts
+        ],
+        update_conflicts=True,
+        unique_fields=["account", "period_end"],
+        update_fields=["balance", "updated_at"],
+    )
+
+    return period_close
+
+
+def trial_balance(property_obj, as_of):
+    """
+    Debit and credit totals of every account linked to the property for its
+    postings through as_of, with paid rent on the revenue credit side. The
+    latest period close on or before as_of seeds the balances from its stored
+    closing balances, and only the postings after it are summed, in a single
+    query.
+    """
+    period_close = (
+        property_obj.period_closes.filter(period_end__lte=as_of)
+        .order_by("-period_end")
+        .first()
+    )
+    start = period_close.period_end + timedelta(days=1) if period_close else None
+
+    accounts = Account.objects.filter(
+        properties=property_obj, type__isnull=False
+    ).with_activity(start=start, end=as_of, property=property_obj)
+    if period_close:
+        closing_balances = period_close.closing_balances.filter(account=OuterRef("pk"))
+        accounts = accounts.annotate(
+            closing_balance=Subquery(closing_balances.values("balance")[:1])
+        )
+
+    lines = []
+    for account in accounts.order_by("type", "name", "pk"):
+        change = account.net_activity()
+        if change is None:
+            continue
+
+        debit = account.debit_total
+        credit = account.credit_total
+        if account.type == "revenue":
+            credit += account.rent_total
+
+        opening = getattr(account, "closing_balance", None)
+        if opening is None:
+            opening = account.initial_balance
+        else:
+            # Activity through the close counts as its net, on the side it moved
+            closed = opening - account.initial_balance
+            if (closed > 0) == (account.normal_balance == "debit"):
+                debit += abs(closed)
+            else:
+                credit += abs(closed)
+
+        lines.append(
+            {
+                "id": account.id,
+                "name": account.name,
+                "type": account.type,
+                "debit": debit,
+                "credit": credit,
+                "balance": opening + change,
+            }
+        )
+
+    total_debit = sum((line["debit"] for line in lines), ZERO)
+    total_credit = sum((line["credit"] for line in lines), ZERO)
+    return {
+        "as_of": as_of,
+        "accounts": lines,
+        "total_debit": total_debit,
+        "total_credit": total_credit,
+        "difference": total_debit - total_credit,
+        "balanced": total_debit == total_credit,
+    }
+
+
+def ledger_version(property_obj):
+    """
+    The latest posting id of the property and the number of postings up to
+    it, which only grows past what a snapshot saw when a posting committed
+    below that id afterwards.
+    """
+    ledger = LedgerPosting.objects.filter(property=property_obj).aggregate(
+        version=Max("id"), postings=Count("id")
+    )
+    return ledger["version"] or 0, ledger["postings"]
+
+
+def _report_window(report):
+    """
+    The (start, end) window of a ReportHistory row. Ranges relative to today
+    are resolved at the first snapshot, later recomputes keep its window.
+    """
+    if report.start_date and report.end_date:
+        return resolve_report_range("custom", report.start_date, report.end_date)
+    if report.result is not None:
+        return tuple(
+            date.fromisoformat(value) if value else None
+            for value in (report.result["start_date"], report.result["end_date"])
+        )
+    return resolve_report_range(report.report_range_type)
+
+
+def snapshot_report(report):
+    """
+    Computes a ReportHistory row's report in full and stores it with the
+    ledger version it reflects.
+    """
+    version, postings = ledger_version(report.property)
+    start, end = _report_window(report)
+
+    result = _report_result(
+        report.property, report.type, report.report_range_type, start, end
+    )
+
+    report.result = report_to_json(result)
+    report.ledger_version = version
+    report.ledger_postings = postings
+    report.snapshot_at = timezone.now()
+    report.save(
+        update_fields=["result", "ledger_version", "ledger_postings", "snapshot_at"]
+    )
+
+
+def _add(values, key, delta):
+    values[key] = str((Decimal(values.get(key, ZERO)) + delta).quantize(ZERO))
+
+
+def _apply_deltas(result, report_type, account_types, deltas):
+    """
+    Moves the account lines and totals of a cached result by per-account
+    deltas. Returns False when a delta has no line to land on, in which case
+    only a full recompute is correct.
+    """
+    sections = dict(PROFIT_LOSS_SECTIONS)
+    if report_type == "balance_sheet":
+        sections.update(BALANCE_SHEET_SECTIONS)
+
+    for account_id, delta in deltas.items():
+        account_type = account_types[account_id]
+        name = next(
+            (name for name, types in sections.items() if account_type in types), None
+        )
+        if name is None:
+            continue
+
+        _add(result["totals_by_type"], account_type, delta)
+
+        if report_type == "balance_sheet" and name in PROFIT_LOSS_SECTIONS:
+            # Income accounts only reach the balance sheet through net income
+            sign = 1 if name == "revenue" else -1
+            _add(result["equity"], "net_income", sign * delta)
+            _add(result["equity"], "total", sign * delta)
+            continue
+
+        section = result[name]
+        line = next(
+            (line for line in section["accounts"] if line["id"] == account_id), None
+        )
+        if line is None:
+            return False
+        _add(line, "amount", delta)
+        _add(section, "total", delta)
+
+    if report_type == "balance_sheet":
+        result["total_liabilities_and_equity"] = str(
+            Decimal(result["liabilities"]["total"]) + Decimal(result["equity"]["total"])
+        )
+    else:
+        result["net_income"] = str(
+            Decimal(result["revenue"]["total"]) - Decimal(result["expenses"]["total"])
+        )
+    return True
+
+
+def refresh_report_snapshot(report):
+    """
+    Brings a ReportHistory row's cached result up to date. The snapshot is
+    served as is when no postings were made since it was taken, moved by the
+    postings made since when possible, and recomputed in full when accounts
+    changed, a posting committed below the snapshot's version or no snapshot
+    exists. Returns "cached", "incremental" or "full".
+    """
+    if report.type not in ("balance_sheet", "profit_loss"):
+        return "cached"
+
+    property_obj = report.property
+    if report.result is None or report.ledger_postings is None:
+        snapshot_report(report)
+        return "full"
+
+    ledger = LedgerPosting.objects.filter(property=property_obj).aggregate(
+        version=Max("id"),
+        total=Count("id"),
+        postings=Count("id", filter=Q(id__lte=report.ledger_version)),
+    )
+    # A posting committed below the snapshot's version was never replayed
+    if ledger["postings"] != report.ledger_postings:
+        snapshot_report(report)
+        return "full"
+
+    version = ledger["version"]
+    if version is None or version <= report.ledger_version:
+        return "cached"
+
+    postings = LedgerPosting.objects.filter(
+        property=property_obj, id__gt=report.ledger_version, id__lte=version
+    )
+
+    start = report.result["start_date"]
+    if report.type == "profit_loss" and start:
+        postings = postings.filter(date__gte=start)
+    postings = postings.filter(date__lte=report.result["end_date"])
+
+    deltas = {
+        row["account_id"]: row["total"]
+        for row in postings.order_by()
+        .values("account_id")
+        .annotate(total=Sum("amount"))
+        if row["total"]
+    }
+
+    # Names, types, opening balances and account links are not in the log
+    accounts = Account.objects.filter(
+        Q(properties=property_obj) | Q(pk__in=deltas.keys())
+    ).values_list("id", "type", "updated_at")
+    account_types = {}
+    is_stale = property_obj.updated_at > report.snapshot_at
+    for account_id, account_type, updated_at in accounts:
+        account_types[account_id] = account_type
+        is_stale = is_stale or updated_at > report.snapshot_at
+
+    result = report.result
+    if is_stale or not _apply_deltas(result, report.type, account_types, deltas):
+        snapshot_report(report)
+        return "full"
+
+    report.result = result
+    report.ledger_postings = ledger["total"]
+    report.ledger_version = version
+    report.snapshot_at = timezone.now()
+    report.save(
+        update_fields=["result", "ledger_version", "ledger_postings", "snapshot_at"]
+    )
+    return "incremental"
@@ -1,4 +1,8 @@
 # rental_api/serializers.py
+from decimal import Decimal
+
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils import timezone
 from rest_framework import serializers
 from core_backend.models import (
     Transaction,
@@ -8,12 +12,144 @@ from core_backend.models import (
     Journal,
     Property,
     RentPayment,
+    RentSchedule,
     ReportHistory,
+    PeriodClose,
+    ClosingBalance,
     User,
 )
 
 
-class AccountSerializer(serializers.ModelSerializer):
+class CompactReferenceSerializer(serializers.Serializer):
+    """
+    Compact {id, name} reference rendered for a nested object unless the
+    request expands it.
+    """
+
+    id = serializers.IntegerField(read_only=True)
+    name = serializers.CharField(read_only=True)
+
+
+class DynamicFieldsMixin:
+    """
+    Adds ?fields= to limit the rendered fields and ?expand= to render nested
+    relations in full instead of as compact references. Query params apply to
+    the top-level serializer; dotted paths such as expand=property.accounts
+    are handed down to the expanded child.
+    """
+
+    # Relation field name -> serializer rendered when the relation is expanded
+    expandable_fields = {}
+
+    # Heavy columns deferred at the queryset level when they are not rendered
+    deferrable_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        self.requested_fields = kwargs.pop("fields", None)
+        self.expand = kwargs.pop("expand", None)
+        super().__init__(*args, **kwargs)
+
+    def _query_param_list(self, name):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+
+        request = self.context.get("request")
+        if parent is not None or request is None:
+            return None
+
+        value = request.query_params.get(name)
+        if not value:
+            return None
+        return [item.strip() for item in value.split(",") if item.strip()]
+
+    def get_fields(self):
+        fields = super().get_fields()
+
+        requested_fields = self.requested_fields
+        if requested_fields is None:
+            requested_fields = self._query_param_list("fields")
+
+        expand = self.expand
+        if expand is None:
+            expand = self._query_param_list("expand") or []
+
+        for name, serializer_class in self.expandable_fields.items():
+            if name not in fields:
+                continue
+
+            many = isinstance(fields[name], serializers.ListSerializer)
+            child_expand = [
+                path.split(".", 1)[1] for path in expand if path.startswith(name + ".")
+            ]
+            if name in expand or child_expand:
+                fields[name] = serializer_class(
+                    many=many, read_only=True, expand=child_expand
+                )
+            else:
+                fields[name] = CompactReferenceSerializer(many=many, read_only=True)
+
+        if requested_fields:
+            fields = {
+                name: field
+                for name, field in fields.items()
+                if name in requested_fields or field.write_only
+            }
+
+        return fields
+
+    def prepare_queryset(self, queryset, prefix="", model=None):
+        """
+        Defers the heavy columns this serializer will not render and loads the
+        relations it will, following the requested fields and expansions.
+        """
+        model = model or self.Meta.model
+        fields = self.fields
+
+        for name in self.deferrable_fields:
+            if name not in fields or fields[name].write_only:
+                queryset = queryset.defer(prefix + name)
+
+        for name, field in fields.items():
+            many = isinstance(field, serializers.ListSerializer)
+            serializer = field.child if many else field
+            if field.write_only or not isinstance(serializer, serializers.BaseSerializer):
+                continue
+
+            path = prefix + field.source
+            related_model = model._meta.get_field(field.source).related_model
+            is_compact = isinstance(serializer, CompactReferenceSerializer)
+
+            if many:
+                related_queryset = related_model._default_manager.all()
+                if is_compact:
+                    related_queryset = related_queryset.only("id", "name")
+                else:
+                    related_queryset = serializer.prepare_queryset(related_queryset)
+                queryset = queryset.prefetch_related(
+                    Prefetch(path, queryset=related_queryset)
+                )
+            else:
+                queryset = queryset.select_related(path)
+                if is_compact:
+                    queryset = queryset.defer(
+                        *[
+                            f"{path}__{related_field.attname}"
+                            for related_field in related_model._meta.concrete_fields
+                            if related_field.attname not in ("id", "name")
+                        ]
+                    )
+                else:
+                    queryset = serializer.prepare_queryset(
+                        queryset, prefix=path + "__", model=related_model
+                    )
+
+        return queryset
+
+
+class AccountSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    deferrable_fields = ("description",)
+
     class Meta:
         model = Account
         fields = (
@@ -53,8 +189,11 @@ class AccountSerializer(serializers.ModelSerializer):
         return instance
 
 
-class PropertySerializer(serializers.ModelSerializer):
-    accounts = AccountSerializer(many=True, read_only=True)
+class PropertySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {"accounts": AccountSerializer}
+    deferrable_fields = ("notes",)
+
+    accounts = CompactReferenceSerializer(many=True, read_only=True)
     account_ids = serializers.ListField(
         child=serializers.IntegerField(),
         write_only=True,
@@ -127,10 +266,13 @@ class PropertySerializer(serializers.ModelSerializer):
         return instance
 
 
-class EntitySerializer(serializers.ModelSerializer):
+class EntitySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {"property": PropertySerializer}
+    deferrable_fields = ("description",)
+
     phone_number = serializers.CharField(required=False, allow_blank=True)
     email = serializers.EmailField(required=False, allow_blank=True)
-    property = PropertySerializer(read_only=True)
+    property = CompactReferenceSerializer(read_only=True)
     property_id = serializers.IntegerField(required=False, write_only=True)
     company = serializers.CharField(required=False, allow_blank=True)
     address = serializers.CharField(required=False, allow_blank=True)
@@ -186,12 +328,90 @@ class EntitySerializer(serializers.ModelSerializer):
         return instance
 
 
-class TransactionSerializer(serializers.ModelSerializer):
-    account = AccountSerializer(read_only=True)
+class TransactionListSerializer(serializers.ListSerializer):
+    """
+    Creates a batch of transactions with one lookup per related model, a single
+    bulk insert and one summed balance update per touched account.
+    """
+
+    def create(self, validated_data):
+        user = self.context["request"].user
+
+        account_ids = {item["account_id"] for item in validated_data}
+        entity_ids = {item["entity_id"] for item in validated_data}
+
+        accounts = Account.objects.filter(user=user).in_bulk(account_ids)
+        entities = Entity.objects.filter(user=user).in_bulk(entity_ids)
+
+        missing_accounts = account_ids - accounts.keys()
+        if missing_accounts:
+            raise serializers.ValidationError(
+                {
+                    "account_id": f"Accounts with these IDs do not exist: {sorted(missing_accounts)}."
+                }
+            )
+
+        missing_entities = entity_ids - entities.keys()
+        if missing_entities:
+            raise serializers.ValidationError(
+                {
+                    "Entity_id": f"Entities with these IDs do not exist: {sorted(missing_entities)}."
+                }
+            )
+
+        # Every row of a batch belongs to the same property
+        property_obj = validated_data[0].get("property") if validated_data else None
+        closed_through = property_obj.closed_through() if property_obj else None
+        if closed_through:
+            closed_rows = [
+                index
+                for index, item in enumerate(validated_data)
+                if item.get("date") and item["date"] <= closed_through
+            ]
+            if closed_rows:
+                raise serializers.ValidationError(
+                    {
+                        "date": f"Rows {closed_rows} are dated in a period closed through {closed_through}."
+                    }
+                )
+
+        transactions = []
+        deltas = {}
+        for item in validated_data:
+            item = dict(item)
+            item.pop("property_id", None)
+            account = accounts[item.pop("account_id")]
+            item["account"] = account
+            item["entity"] = entities[item.pop("entity_id")]
+            item.setdefault("user", user)
+
+            transaction = Transaction(**item)
+            transactions.append(transaction)
+
+            delta = account.balance_delta(transaction)
+            if delta is not None:
+                key = (account.id, transaction.date, transaction.property_id)
+                deltas[key] = deltas.get(key, 0) + delta
+
+        Transaction.objects.bulk_create(transactions)
+        Account.apply_balance_deltas(deltas)
+
+        return transactions
+
+
+class TransactionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {
+        "account": AccountSerializer,
+        "property": PropertySerializer,
+        "entity": EntitySerializer,
+    }
+    deferrable_fields = ("memo",)
+
+    account = CompactReferenceSerializer(read_only=True)
     account_id = serializers.IntegerField(write_only=True)
-    property = PropertySerializer(read_only=True)
+    property = CompactReferenceSerializer(read_only=True)
     property_id = serializers.IntegerField(required=False, write_only=True)
-    entity = EntitySerializer(read_only=True)
+    entity = CompactReferenceSerializer(read_only=True)
     entity_id = serializers.IntegerField(write_only=True)
     date = serializers.DateField(required=False)
     type = serializers.CharField(required=False)
@@ -216,6 +436,7 @@ class TransactionSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         )
+        list_serializer_class = TransactionListSerializer
 
     def create(self, validated_data):
         user = self.context["request"].user
@@ -261,9 +482,12 @@ class TransactionSerializer(serializers.ModelSerializer):
         return instance
 
 
-class JournalItemSerializer(serializers.ModelSerializer):
+class JournalItemSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {"account": AccountSerializer}
+    deferrable_fields = ("memo",)
+
     user = serializers.PrimaryKeyRelatedField(read_only=True)
-    account = AccountSerializer(read_only=True)
+    account = CompactReferenceSerializer(read_only=True)
     account_id = serializers.IntegerField(write_only=True)
     id = serializers.IntegerField(required=False)
 
@@ -300,7 +524,127 @@ class JournalItemSerializer(serializers.ModelSerializer):
         return instance
 
 
-class JournalSerializer(serializers.ModelSerializer):
+def journal_imbalances(journals_data):
+    """
+    Checks that each journal's debits equal its credits in one pass over the
+    items of the whole batch, summed as integer cents. Returns the error
+    details of each failing journal by its index in the batch.
+    """
+    totals = [{"debit": 0, "credit": 0} for _ in journals_data]
+    untyped = [[] for _ in journals_data]
+
+    for index, journal_data in enumerate(journals_data):
+        journal_totals = totals[index]
+        for position, item in enumerate(journal_data.get("journal_items", ())):
+            if item.get("type") in journal_totals:
+                # Amounts carry two decimal places, so this is exact
+                journal_totals[item["type"]] += int(item["amount"].scaleb(2))
+            else:
+                untyped[index].append(position)
+
+    errors = {}
+    for index, journal_totals in enumerate(totals):
+        messages = []
+        if untyped[index]:
+            messages.append(f"Items {untyped[index]} must be a debit or a credit.")
+
+        debit, credit = journal_totals["debit"], journal_totals["credit"]
+        if debit != credit:
+            debit, credit, difference = (
+                Decimal(cents).scaleb(-2)
+                for cents in (debit, credit, abs(debit - credit))
+            )
+            messages.append(
+                f"Debits of {debit} do not equal credits of {credit}, "
+                f"a difference of {difference}."
+            )
+
+        if messages:
+            errors[index] = {"journal_items": messages}
+    return errors
+
+
+def create_journals(user, journals_data):
+    """
+    Creates journals with all their items in one bulk insert, then applies
+    the items' balance effects summed into one update per account.
+    """
+    account_ids = {
+        item["account_id"]
+        for journal_data in journals_data
+        for item in journal_data["journal_items"]
+    }
+    accounts = Account.objects.filter(user=user).in_bulk(account_ids)
+
+    missing_accounts = account_ids - accounts.keys()
+    if missing_accounts:
+        raise serializers.ValidationError(
+            {
+                "account_id": f"Accounts with these IDs do not exist: {sorted(missing_accounts)}."
+            }
+        )
+
+    journals = []
+    journal_items = []
+    deltas = {}
+    for journal_data in journals_data:
+        journal_data = dict(journal_data)
+        items_data = journal_data.pop("journal_items")
+        journal_data.setdefault("user", user)
+
+        journal = Journal.objects.create(**journal_data)
+        journals.append(journal)
+
+        for item_data in items_data:
+            item_data = dict(item_data)
+            item_data.pop("id", None)
+            account = accounts[item_data.pop("account_id")]
+            item = JournalItem(journal=journal, user=user, account=account, **item_data)
+            journal_items.append(item)
+
+            delta = account.balance_delta(item)
+            if delta is not None:
+                key = (account.id, journal.date, journal.property_id)
+                deltas[key] = deltas.get(key, 0) + delta
+
+    JournalItem.objects.bulk_create(journal_items)
+    Account.apply_balance_deltas(deltas)
+
+    # Renders the created journals without a query per journal
+    prefetch_related_objects(
+        journals,
+        Prefetch(
+            "journal_items", queryset=JournalItem.objects.select_related("account")
+        ),
+    )
+    return journals
+
+
+class JournalListSerializer(serializers.ListSerializer):
+    """
+    Creates a batch of journals, such as month-end accruals, with a single
+    insert for all of their items and one balance update per touched account.
+    The whole batch is rejected if any journal does not balance.
+    """
+
+    def to_internal_value(self, data):
+        journals_data = super().to_internal_value(data)
+
+        errors = journal_imbalances(journals_data)
+        if errors:
+            # Errors line up with the posted journals, like field errors do
+            raise serializers.ValidationError(
+                [errors.get(index, {}) for index in range(len(journals_data))]
+            )
+        return journals_data
+
+    def create(self, validated_data):
+        return create_journals(self.context["request"].user, validated_data)
+
+
+class JournalSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    deferrable_fields = ("item_list",)
+
     user = serializers.PrimaryKeyRelatedField(read_only=True)
     journal_items = JournalItemSerializer(many=True)
 
@@ -317,58 +661,153 @@ class JournalSerializer(serializers.ModelSerializer):
             "updated_at",
         )
         read_only_fields = ("id", "created_at", "updated_at")
+        list_serializer_class = JournalListSerializer
+
+    def validate(self, attrs):
+        # Batches are checked in one pass by JournalListSerializer
+        if self.parent is None and "journal_items" in attrs:
+            items = attrs["journal_items"]
+
+            # Partial edits only send the changed fields of stored items
+            if self.instance is not None:
+                stored_items = {
+                    item["id"]: item
+                    for item in self.instance.journal_items.values(
+                        "id", "account_id", "type", "amount"
+                    )
+                }
+                items = [
+                    {**stored_items.get(item.get("id"), {}), **item} for item in items
+                ]
+
+            errors = journal_imbalances([{**attrs, "journal_items": items}])
+            if errors:
+                raise serializers.ValidationError(errors[0])
+        return attrs
 
     def create(self, validated_data):
-        user = self.context["request"].user
-        journal_items_data = validated_data.pop("journal_items")
+        return create_journals(self.context["request"].user, [validated_data])[0]
 
-        journal = Journal.objects.create(user=user, **validated_data)
+    def update(self, instance, validated_data):
+        """
+        Saves only what changed: the journal, the items that differ in one
+        bulk_update, new items in one bulk insert, and the net balance change
+        per account between the old and new items. When no item's account,
+        type or amount changed and the date stayed, nothing is posted.
+        Omitting journal_items leaves the items as they are.
+        """
+        journal_items_data = validated_data.pop("journal_items", None)
 
-        for item_data in journal_items_data:
-            JournalItem.objects.create(journal=journal, user=user, **item_data)
+        existing_items = {item.id: item for item in instance.journal_items.all()}
+        old_date = instance.date
+        old_items = [
+            JournalItem(account_id=item.account_id, type=item.type, amount=item.amount)
+            for item in existing_items.values()
+        ]
 
-        return journal
+        for attr in ("name", "date", "is_deleted"):
+            if attr in validated_data:
+                setattr(instance, attr, validated_data[attr])
+        balance_changed = instance.date != old_date
+
+        items = list(existing_items.values())
+        items_to_create = []
+        items_to_update = []
+        fields_to_update = set()
+        items_to_delete = []
+        if journal_items_data is not None:
+            items = []
+            for item_data in journal_items_data:
+                item_data = dict(item_data)
+                item = existing_items.pop(item_data.pop("id", None), None)
+
+                if item is None:
+                    item = JournalItem(
+                        journal=instance, user=instance.user, **item_data
+                    )
+                    items_to_create.append(item)
+                else:
+                    changed = [
+                        attr
+                        for attr, value in item_data.items()
+                        if getattr(item, attr) != value
+                    ]
+                    if changed:
+                        for attr in changed:
+                            setattr(item, attr, item_data[attr])
+                        items_to_update.append(item)
+                        fields_to_update.update(changed)
+                    if {"account_id", "type", "amount"} & set(changed):
+                        balance_changed = True
+                items.append(item)
+
+            # Items that exist in db but not in the request are removed
+            items_to_delete = list(existing_items.values())
+            if items_to_create or items_to_delete:
+                balance_changed = True
+
+        deltas = {}
+        if balance_changed:
+            account_ids = {item.account_id for item in [*old_items, *items]}
+            accounts = Account.objects.filter(user=instance.user).in_bulk(account_ids)
+
+            missing_accounts = {item.account_id for item in items} - accounts.keys()
+            if missing_accounts:
+                raise serializers.ValidationError(
+                    {
+                        "account_id": f"Accounts with these IDs do not exist: {sorted(missing_accounts)}."
+                    }
+                )
 
-    def update(self, instance, validated_data):
-        journal_items_data = validated_data.pop("journal_items", [])
+            for posted_items, day, is_reversal in (
+                (old_items, old_date, True),
+                (items, instance.date, False),
+            ):
+                for item in posted_items:
+                    account = accounts.get(item.account_id)
+                    delta = account and account.balance_delta(item, is_reversal)
+                    if delta is not None:
+                        key = (account.id, day, instance.property_id)
+                        deltas[key] = deltas.get(key, 0) + delta
 
-        instance.name = validated_data.get("name", instance.name)
-        instance.date = validated_data.get("date", instance.date)
-        instance.is_deleted = validated_data.get("is_deleted", instance.is_deleted)
         instance.save()
 
-        existing_items = {item.id: item for item in instance.journal_items.all()}
-        items_to_keep = []
-
-        for item_data in journal_items_data:
-            item_id = item_data.get("id")
-            if item_id in existing_items:
-                # Update existing item
-                item = existing_items[item_id]
-                for attr, value in item_data.items():
-                    setattr(item, attr, value)
-                item.save()
-                items_to_keep.append(item_id)
-            else:
-                # Create new item if not present
-                item_data.pop("id", None)
-                JournalItem.objects.create(
-                    journal=instance, user=instance.user, **item_data
-                )
-
-        # Remove items that exist in db but not in request
-        items_to_delete = set(existing_items.keys()) - set(items_to_keep)
+        if items_to_update:
+            now = timezone.now()
+            for item in items_to_update:
+                item.updated_at = now
+            JournalItem.objects.bulk_update(
+                items_to_update, [*sorted(fields_to_update), "updated_at"]
+            )
+        if items_to_create:
+            JournalItem.objects.bulk_create(items_to_create)
         if items_to_delete:
-            JournalItem.objects.filter(id__in=items_to_delete).delete()
-
+            JournalItem.objects.filter(
+                id__in=[item.id for item in items_to_delete]
+            ).delete()
+
+        Account.apply_balance_deltas(deltas)
+        self.balance_account_ids = {key[0] for key, delta in deltas.items() if delta}
+
+        prefetch_related_objects(
+            [instance],
+            Prefetch(
+                "journal_items", queryset=JournalItem.objects.select_related("account")
+            ),
+        )
         return instance
 
 
-class RentPaymentSerializer(serializers.ModelSerializer):
+class RentPaymentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {
+        "property": PropertySerializer,
+        "entity": EntitySerializer,
+    }
+
     user = serializers.PrimaryKeyRelatedField(read_only=True)
-    property = PropertySerializer(read_only=True)
+    property = CompactReferenceSerializer(read_only=True)
     property_id = serializers.IntegerField(required=False, write_only=True)
-    entity = EntitySerializer(read_only=True)
+    entity = CompactReferenceSerializer(read_only=True)
     entity_id = serializers.IntegerField(write_only=True)
 
     class Meta:
@@ -422,8 +861,70 @@ class RentPaymentSerializer(serializers.ModelSerializer):
         return instance
 
 
-class ReportHistorySerializer(serializers.ModelSerializer):
-    property = PropertySerializer(read_only=True)
+class RentScheduleSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {
+        "property": PropertySerializer,
+        "entity": EntitySerializer,
+    }
+
+    property = CompactReferenceSerializer(read_only=True)
+    entity = CompactReferenceSerializer(read_only=True)
+    entity_id = serializers.IntegerField(write_only=True)
+
+    class Meta:
+        model = RentSchedule
+        fields = (
+            "id",
+            "property",
+            "entity",
+            "entity_id",
+            "amount",
+            "day_of_month",
+            "start_date",
+            "end_date",
+            "is_active",
+            "created_at",
+            "updated_at",
+        )
+        read_only_fields = ("id", "created_at", "updated_at")
+
+    def validate(self, data):
+        start_date = data.get("start_date", getattr(self.instance, "start_date", None))
+        end_date = data.get("end_date", getattr(self.instance, "end_date", None))
+        if start_date and end_date and end_date < start_date:
+            raise serializers.ValidationError(
+                {"end_date": "end_date must be on or after start_date."}
+            )
+        return data
+
+    def create(self, validated_data):
+        user = self.context["request"].user
+        validated_data["user"] = user
+
+        try:
+            validated_data["entity"] = Entity.objects.get(
+                id=validated_data.pop("entity_id"), user=user
+            )
+        except Entity.DoesNotExist:
+            raise serializers.ValidationError(
+                {"entity_id": "Entity with this ID does not exist."}
+            )
+
+        return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        # A schedule keeps its entity, end it and start another to change tenants
+        validated_data.pop("entity_id", None)
+        return super().update(instance, validated_data)
+
+
+class ReportHistorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {"property": PropertySerializer}
+
+    # The cached result is only rendered by the report detail endpoint
+    deferrable_fields = ("result",)
+
+    property = CompactReferenceSerializer(read_only=True)
     property_id = serializers.IntegerField(required=False, write_only=True)
 
     class Meta:
@@ -438,9 +939,12 @@ class ReportHistorySerializer(serializers.ModelSerializer):
             "start_date",
             "end_date",
             "report_ran_on_date",
+            "ledger_version",
+            "snapshot_at",
             "is_deleted",
             "created_at",
         )
+        read_only_fields = ("ledger_version", "snapshot_at")
 
     def create(self, validated_data):
         user = self.context["request"].user
@@ -448,6 +952,23 @@ class ReportHistorySerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class ClosingBalanceSerializer(serializers.ModelSerializer):
+    account = CompactReferenceSerializer(read_only=True)
+
+    class Meta:
+        model = ClosingBalance
+        fields = ("account", "balance")
+
+
+class PeriodCloseSerializer(serializers.ModelSerializer):
+    closing_balances = ClosingBalanceSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = PeriodClose
+        fields = ("id", "property", "period_end", "closing_balances", "created_at")
+        read_only_fields = ("property",)
+
+
 class UserSerializer(serializers.ModelSerializer):
     """
     Serializer for the User model, focused on user-editable profile fields.
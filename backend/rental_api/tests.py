@@ -1,3 +1,1815 @@
+import base64
+import json
+from datetime import date
+from decimal import Decimal
+from io import BytesIO, StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core_backend.models import (
+    Account,
+    Entity,
+    Journal,
+    JournalItem,
+    LedgerPosting,
+    PeriodClose,
+    Property,
+    RentPayment,
+    RentPaymentRollup,
+    RentSchedule,
+    ReportHistory,
+    Transaction,
+)
+from rental_api import cache as list_cache
+from rental_api.importers import iter_csv_lines, iter_ofx_lines
+from rental_api.pagination import KeysetPagination
+from rental_api.reports import close_period
+
+
+class ListQueryBudgetTests(TestCase):
+    """
+    Every list endpoint must run a fixed number of queries, whatever the
+    number of rows it returns.
+    """
+
+    # Maximum queries per endpoint, including authentication and property lookup.
+    QUERY_BUDGETS = {
+        "transactions": 4,
+        "accounts": 2,
+        "entities": 3,
+        "journals": 4,
+        "properties": 2,
+        "rentPayments": 4,
+        "reports": 3,
+    }
+
+    def setUp(self):
+        self.user = User.objects.create_user("budget", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.property = Property.objects.create(
+            user=self.user, name="Main", address="1 Main St"
+        )
+        self.bank = Account.objects.create(user=self.user, name="Bank", type="bank")
+        self.revenue = Account.objects.create(
+            user=self.user, name="Revenue", type="revenue"
+        )
+        self.property.accounts.add(self.bank, self.revenue)
+
+    def add_rows(self, count):
+        for i in range(count):
+            entity = Entity.objects.create(
+                user=self.user, property=self.property, name=f"Tenant {i}"
+            )
+            Transaction.objects.create(
+                user=self.user,
+                property=self.property,
+                account=self.bank,
+                entity=entity,
+                date=date(2025, 1, 1 + i % 28),
+                amount=10,
+                type="debit",
+            )
+            journal = Journal.objects.create(
+                user=self.user, property=self.property, name=f"J{i}", date=date(2025, 1, 1)
+            )
+            JournalItem.objects.create(
+                user=self.user, journal=journal, account=self.bank, type="debit", amount=5
+            )
+            JournalItem.objects.create(
+                user=self.user, journal=journal, account=self.revenue, type="credit", amount=5
+            )
+            RentPayment.objects.create(
+                user=self.user,
+                property=self.property,
+                entity=entity,
+                amount=100,
+                date=date(2025, 1, 1),
+                status="paid",
+            )
+            ReportHistory.objects.create(
+                user=self.user, property=self.property, type="balance_sheet"
+            )
+            extra_property = Property.objects.create(
+                user=self.user, name=f"Other {i}", address="2 Side St"
+            )
+            extra_property.accounts.add(self.bank)
+
+    def count_queries(self, endpoint):
+        # Measures the database work of a cache miss
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                f"/api/{endpoint}/", {"property_id": self.property.id}
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(context.captured_queries)
+
+    def test_list_endpoints_stay_within_query_budget(self):
+        self.add_rows(2)
+        small_counts = {
+            endpoint: self.count_queries(endpoint) for endpoint in self.QUERY_BUDGETS
+        }
+
+        self.add_rows(10)
+
+        for endpoint, budget in self.QUERY_BUDGETS.items():
+            with self.subTest(endpoint=endpoint):
+                count = self.count_queries(endpoint)
+                self.assertEqual(count, small_counts[endpoint])
+                self.assertLessEqual(count, budget)
+
+
+class ReportRunTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("reports", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.property = Property.objects.create(
+            user=self.user, name="Main", address="1 Main St"
+        )
+        self.bank = Account.objects.create(
+            user=self.user, name="Bank", type="bank", initial_balance=1000
+        )
+        self.revenue = Account.objects.create(
+            user=self.user, name="Revenue", type="revenue"
+        )
+        self.expense = Account.objects.create(
+            user=self.user, name="Repairs", type="expense"
+        )
+        self.property.accounts.add(self.bank, self.revenue, self.expense)
+        entity = Entity.objects.create(
+            user=self.user, property=self.property, name="Plumber"
+        )
+
+        for day, amount in ((date(2024, 6, 1), 200), (date(2025, 2, 1), 50)):
+            Transaction.objects.create(
+                user=self.user,
+                property=self.property,
+                account=self.bank,
+                entity=entity,
+                date=day,
+                amount=amount,
+                type="credit",
+            )
+            journal = Journal.objects.create(
+                user=self.user, property=self.property, name="Repair", date=day
+            )
+            JournalItem.objects.create(
+                user=self.user,
+                journal=journal,
+                account=self.expense,
+                type="debit",
+                amount=amount,
+            )
+
+        for day, status in ((date(2024, 7, 1), "paid"), (date(2025, 3, 1), "paid")):
+            RentPayment.objects.create(
+                user=self.user,
+                property=self.property,
+                amount=900,
+                date=day,
+                status=status,
+            )
+        RentPayment.objects.create(
+            user=self.user,
+            property=self.property,
+            amount=900,
+            date=date(2025, 4, 1),
+            status="due",
+        )
+
+    def run_report(self, **params):
+        response = self.client.get(
+            "/api/reports/run/", {"property_id": self.property.id, **params}
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_profit_and_loss_is_limited_to_the_window(self):
+        report = self.run_report(
+            type="profit_loss",
+            report_range_type="custom",
+            start_date="2025-01-01",
+            end_date="2025-12-31",
+        )
+
+        self.assertEqual(report["revenue"]["total"], "900.00")
+        self.assertEqual(report["expenses"]["total"], "50.00")
+        self.assertEqual(report["net_income"], "850.00")
+        self.assertEqual(report["totals_by_type"], {"expense": "50.00", "revenue": "900.00"})
+
+    def test_balance_sheet_runs_a_fixed_number_of_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            report = self.run_report(type="balance_sheet", report_range_type="all_time")
+
+        self.assertEqual(report["assets"]["total"], "750.00")
+        self.assertEqual(report["equity"]["net_income"], "1550.00")
+        self.assertLessEqual(len(context.captured_queries), 6)
+
+    def test_invalid_range_is_rejected(self):
+        response = self.client.get(
+            "/api/reports/run/",
+            {
+                "property_id": self.property.id,
+                "type": "profit_loss",
+                "report_range_type": "custom",
+            },
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class ReportSnapshotTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("snapshots", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.property = Property.objects.create(
+            user=self.user, name="Main", address="1 Main St"
+        )
+        self.bank = Account.objects.create(user=self.user, name="Bank", type="bank")
+        self.expense = Account.objects.create(
+            user=self.user, name="Repairs", type="expense"
+        )
+        self.property.accounts.add(self.bank, self.expense)
+        self.entity = Entity.objects.create(
+            user=self.user, property=self.property, name="Plumber"
+        )
+        self.post_transaction(self.expense, "2025-01-10", "100.00")
+
+    def post_transaction(self, account, day, amount):
+        response = self.client.post(
+            f"/api/transactions/?property_id={self.property.id}",
+            [
+                {
+                    "account_id": account.id,
+                    "entity_id": self.entity.id,
+                    "date": day,
+                    "amount": amount,
+                    "type": "debit",
+                }
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+
+    def create_report(self, type):
+        response = self.client.post(
+            f"/api/reports/?property_id={self.property.id}",
+            {
+                "type": type,
+                "report_range_type": "custom",
+                "start_date": "2025-01-01",
+                "end_date": "2025-12-31",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()["id"]
+
+    def reopen(self, report_id):
+        response = self.client.get(f"/api/reports/{report_id}/")
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def fresh_result(self, type):
+        return self.client.get(
+            "/api/reports/run/",
+            {
+                "property_id": self.property.id,
+                "type": type,
+                "report_range_type": "custom",
+                "start_date": "2025-01-01",
+                "end_date": "2025-12-31",
+            },
+        ).json()
+
+    def test_reopen_serves_snapshot_then_applies_only_new_postings(self):
+        report_ids = {
+            type: self.create_report(type) for type in ("profit_loss", "balance_sheet")
+        }
+
+        for type, report_id in report_ids.items():
+            with self.subTest(type=type):
+                self.assertEqual(self.reopen(report_id)["snapshot_status"], "cached")
+
+        self.post_transaction(self.expense, "2025-03-01", "40.00")
+        self.post_transaction(self.bank, "2025-03-02", "15.00")
+        self.post_transaction(self.expense, "2026-01-05", "999.00")
+
+        for type, report_id in report_ids.items():
+            with self.subTest(type=type):
+                report = self.reopen(report_id)
+                self.assertEqual(report["snapshot_status"], "incremental")
+                self.assertEqual(report["result"], self.fresh_result(type))
+
+        self.assertEqual(
+            self.reopen(report_ids["profit_loss"])["result"]["net_income"], "-140.00"
+        )
+
+    def test_account_changes_force_a_full_recompute(self):
+        report_id = self.create_report("profit_loss")
+
+        self.expense.name = "Maintenance"
+        self.expense.save()
+        self.post_transaction(self.expense, "2025-03-01", "40.00")
+
+        report = self.reopen(report_id)
+        self.assertEqual(report["snapshot_status"], "full")
+        self.assertEqual(report["result"]["expenses"]["accounts"][0]["name"], "Maintenance")
+
+    def test_postings_committed_below_the_version_force_a_full_recompute(self):
+        # An id taken by a transaction that commits after the snapshot
+        reserved = LedgerPosting.objects.create(
+            account=self.expense, property=self.property, amount=0
+        )
+        self.post_transaction(self.expense, "2025-01-20", "10.00")
+        LedgerPosting.objects.filter(pk=reserved.pk).delete()
+        report_id = self.create_report("profit_loss")
+
+        Transaction.objects.create(
+            user=self.user,
+            property=self.property,
+            account=self.expense,
+            entity=self.entity,
+            date=date(2025, 2, 1),
+            amount=Decimal("5.00"),
+            type="debit",
+        )
+        LedgerPosting.objects.create(
+            id=reserved.id,
+            account=self.expense,
+            property=self.property,
+            date=date(2025, 2, 1),
+            amount=Decimal("5.00"),
+        )
+
+        report = self.reopen(report_id)
+        self.assertEqual(report["snapshot_status"], "full")
+        self.assertEqual(report["result"], self.fresh_result("profit_loss"))
+        self.assertEqual(report["result"]["net_income"], "-115.00")
+        self.assertEqual(self.reopen(report_id)["snapshot_status"], "cached")
+
+    def test_relative_ranges_keep_their_first_window(self):
+        response = self.client.post(
+            f"/api/reports/?property_id={self.property.id}",
+            {"type": "balance_sheet", "report_range_type": "all_time"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        report_id = response.json()["id"]
+
+        # As if the snapshot had been taken at the end of June
+        report = ReportHistory.objects.get(pk=report_id)
+        report.result["end_date"] = "2025-06-30"
+        report.save(update_fields=["result"])
+
+        self.post_transaction(self.expense, "2025-09-01", "6.00")
+        incremental = self.reopen(report_id)
+        self.assertEqual(incremental["snapshot_status"], "incremental")
+
+        self.expense.save()
+        self.post_transaction(self.expense, "2025-09-02", "7.00")
+        full = self.reopen(report_id)
+        self.assertEqual(full["snapshot_status"], "full")
+        self.assertEqual(full["result"], incremental["result"])
+        self.assertEqual(full["result"]["end_date"], "2025-06-30")
+        self.assertEqual(full["result"]["equity"]["net_income"], "-100.00")
+
+
+class PeriodCloseTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("closing", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.property = Property.objects.create(
+            user=self.user, name="Main", address="1 Main St"
+        )
+        self.bank = Account.objects.create(
+            user=self.user, name="Bank", type="bank", initial_balance=500
+        )
+        self.revenue = Account.objects.create(
+            user=self.user, name="Revenue", type="revenue"
+        )
+        self.property.accounts.add(self.bank, self.revenue)
+        entity = Entity.objects.create(
+            user=self.user, property=self.property, name="Tenant"
+        )
+
+        self.transactions = [
+            Transaction.objects.create(
+                user=self.user,
+                property=self.property,
+                account=self.bank,
+                entity=entity,
+                date=day,
+                amount=100,
+                type="debit",
+            )
+            for day in (date(2024, 11, 5), date(2025, 2, 5))
+        ]
+        RentPayment.objects.create(
+            user=self.user,
+            property=self.property,
+            amount=900,
+            date=date(2024, 12, 1),
+            status="paid",
+        )
+
+    def close(self, period_end):
+        return self.client.post(
+            f"/api/properties/{self.property.id}/closes/",
+            {"period_end": period_end},
+            format="json",
+        )
+
+    def balance_sheet(self, end_date):
+        return self.client.get(
+            "/api/reports/run/",
+            {
+                "property_id": self.property.id,
+                "type": "balance_sheet",
+                "report_range_type": "custom",
+                "start_date": "1900-01-01",
+                "end_date": end_date,
+            },
+        ).json()
+
+    def test_close_stores_closing_balances_and_seeds_reports(self):
+        before = self.balance_sheet("2025-03-31")
+
+        response = self.close("2024-12-31")
+        self.assertEqual(response.status_code, 201, response.content)
+        closing = {
+            row["account"]["name"]: row["balance"]
+            for row in response.json()["closing_balances"]
+        }
+        self.assertEqual(closing, {"Bank": "600.00", "Revenue": "900.00"})
+
+        self.assertEqual(self.balance_sheet("2025-03-31"), before)
+        self.assertEqual(
+            self.bank.balance_checkpoints.get(period_end=date(2024, 12, 31)).balance,
+            Decimal("600.00"),
+        )
+
+    def test_closed_periods_reject_edits(self):
+        self.assertEqual(self.close("2024-12-31").status_code, 201)
+
+        closed, open_ = self.transactions
+        response = self.client.put(
+            f"/api/transactions/{closed.id}/", {"amount": "1.00"}, format="json"
+        )
+        self.assertEqual(response.status_code, 409)
+
+        response = self.client.put(
+            f"/api/transactions/{open_.id}/", {"date": "2024-12-15"}, format="json"
+        )
+        self.assertEqual(response.status_code, 409)
+
+        response = self.client.put(
+            f"/api/transactions/{open_.id}/", {"amount": "1.00"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def test_periods_close_in_order(self):
+        self.assertEqual(self.close("2024-12-31").status_code, 201)
+        self.assertEqual(self.close("2024-11-30").status_code, 400)
+        self.assertEqual(self.close("2025-01-15").status_code, 400)
+
+
+class AccountRegisterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("register", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.property = Property.objects.create(
+            user=self.user, name="Main", address="1 Main St"
+        )
+        self.revenue = Account.objects.create(
+            user=self.user, name="Revenue", type="revenue", initial_balance=10
+        )
+        self.property.accounts.add(self.revenue)
+
+        for day in (3, 1, 2, 2):
+            Transaction.objects.create(
+                user=self.user,
+                property=self.property,
+                account=self.revenue,
+                date=date(2025, 1, day),
+                amount=day,
+                type="credit" if day != 3 else "debit",
+            )
+        journal = Journal.objects.create(
+            user=self.user, property=self.property, name="J", date=date(2025, 1, 2)
+        )
+        JournalItem.objects.create(
+            user=self.user, journal=journal, account=self.revenue, type="credit", amount=7
+        )
+        RentPayment.objects.create(
+            user=self.user,
+            property=self.property,
+            amount=100,
+            date=date(2025, 1, 2),
+            status="paid",
+        )
+
+    def walk(self, page_size):
+        rows, openings, cursor = [], [], None
+        while True:
+            params = {"page_size": page_size}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.client.get(
+                f"/api/accounts/{self.revenue.id}/register/", params
+            )
+            self.assertEqual(response.status_code, 200, response.content)
+            page = response.json()
+            rows += page["results"]
+            openings.append(page["opening_balance"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                return rows, openings
+
+    def test_pages_carry_the_running_balance(self):
+        rows, openings = self.walk(page_size=2)
+
+        self.assertEqual(
+            [(row["date"], row["source"]) for row in rows],
+            [
+                ("2025-01-01", "transaction"),
+                ("2025-01-02", "journal_item"),
+                ("2025-01-02", "rent_payment"),
+                ("2025-01-02", "transaction"),
+                ("2025-01-02", "transaction"),
+                ("2025-01-03", "transaction"),
+            ],
+        )
+        self.assertEqual(
+            [row["running_balance"] for row in rows],
+            ["11.00", "18.00", "118.00", "120.00", "122.00", "119.00"],
+        )
+        self.assertEqual(openings, ["10.00", "18.00", "120.00"])
+        self.assertEqual(rows, self.walk(page_size=100)[0])
+        self.assertEqual(
+            Decimal(rows[-1]["running_balance"]), self.revenue.audit_balance()
+        )
+
+    def test_deleted_rent_is_left_out_like_the_stored_balance(self):
+        RentPayment.objects.create(
+            user=self.user,
+            property=self.property,
+            amount=50,
+            date=date(2025, 1, 2),
+            status="paid",
+            is_deleted=True,
+        )
+        Account.objects.filter(pk=self.revenue.pk).update(
+            balance=self.revenue.audit_balance()
+        )
+        self.revenue.refresh_from_db()
+
+        rows, openings = self.walk(page_size=3)
+        self.assertEqual(
+            [row["running_balance"] for row in rows],
+            ["11.00", "18.00", "118.00", "120.00", "122.00", "119.00"],
+        )
+        self.assertEqual(openings, ["10.00", "118.00"])
+        self.assertEqual(Decimal(rows[-1]["running_balance"]), self.revenue.balance)
+
+
+class TrialBalanceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("trial", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.property = Property.objects.create(
+            user=self.user, name="Main", address="1 Main St"
+        )
+        other_property = Property.objects.create(
+            user=self.user, name="Other", address="2 Side St"
+        )
+        self.bank = Account.objects.create(user=self.user, name="Bank", type="bank")
+        self.expense = Account.objects.create(
+            user=self.user, name="Repairs", type="expense"
+        )
+        self.property.accounts.add(self.bank, self.expense)
+        other_property.accounts.add(self.bank)
+
+        for property_obj, day in (
+            (self.property, date(2025, 1, 5)),
+            (self.property, date(2025, 6, 5)),
+            (other_property, date(2025, 1, 5)),
+        ):
+            journal = Journal.objects.create(
+                user=self.user, property=property_obj, name="Repair", date=day
+            )
+            for account, type in ((self.expense, "debit"), (self.bank, "credit")):
+                JournalItem.objects.create(
+                    user=self.user, journal=journal, account=account, type=type, amount=40
+                )
+
+    def trial_balance(self, as_of):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                "/api/reports/trial-balance/",
+                {"property_id": self.property.id, "as_of": as_of},
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json(), len(context.captured_queries)
+
+    def test_totals_are_scoped_to_property_and_date(self):
+        report, queries = self.trial_balance("2025-03-31")
+
+        self.assertEqual(
+            [(line["name"], line["debit"], line["credit"]) for line in report["accounts"]],
+            [("Bank", "0.00", "40.00"), ("Repairs", "40.00", "0.00")],
+        )
+        self.assertTrue(report["balanced"])
+        # The property lookup, the latest close and the account totals
+        self.assertEqual(queries, 3)
+
+    def test_closed_periods_are_read_from_their_closing_balances(self):
+        close_period(self.property, date(2025, 3, 31))
+
+        # Rewriting closed history directly leaves the closing balances alone
+        JournalItem.objects.filter(
+            journal__property=self.property, journal__date=date(2025, 1, 5)
+        ).update(amount=1000)
+
+        report, queries = self.trial_balance("2025-12-31")
+        self.assertEqual(
+            [
+                (line["name"], line["debit"], line["credit"], line["balance"])
+                for line in report["accounts"]
+            ],
+            [
+                ("Bank", "0.00", "80.00", "-80.00"),
+                ("Repairs", "80.00", "0.00", "80.00"),
+            ],
+        )
+        self.assertTrue(report["balanced"])
+        self.assertEqual(queries, 3)
+
+    def test_rent_without_an_offset_is_flagged_unbalanced(self):
+        revenue = Account.objects.create(user=self.user, name="Rent", type="revenue")
+        self.property.accounts.add(revenue)
+        RentPayment.objects.create(
+            user=self.user,
+            property=self.property,
+            amount=900,
+            date=date(2025, 2, 1),
+            status="paid",
+        )
+
+        report, _ = self.trial_balance("2025-12-31")
+        self.assertFalse(report["balanced"])
+        self.assertEqual(report["difference"], "-900.00")
+
+
+class RentCalendarTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("calendar", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.property = Property.objects.create(
+            user=self.user, name="Main", address="1 Main St"
+        )
+        for day, status, is_deleted in (
+            (date(2025, 1, 1), "paid", False),
+            (date(2025, 1, 1), "paid", False),
+            (date(2025, 1, 1), "due", False),
+            (date(2025, 1, 1), "paid", True),
+            (date(2025, 12, 1), "scheduled", False),
+            (date(2026, 1, 1), "scheduled", False),
+        ):
+            RentPayment.objects.create(
+                user=self.user,
+                property=self.property,
+                amount=500,
+                date=day,
+                status=status,
+                is_deleted=is_deleted,
+            )
+
+    def get(self, **params):
+        return self.client.get(
+            "/api/rentPayments/calendar/", {"property_id": self.property.id, **params}
+        )
+
+    def test_year_summary_comes_from_one_grouped_query(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.get(start_date="2025-01-01", end_date="2025-12-31")
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(
+            response.json()["days"],
+            [
+                {
+                    "date": "2025-01-01",
+                    "count": 3,
+                    "statuses": {
+                        "due": {"count": 1, "total_amount": "500.00"},
+                        "paid": {"count": 2, "total_amount": "1000.00"},
+                    },
+                },
+                {
+                    "date": "2025-12-01",
+                    "count": 1,
+                    "statuses": {"scheduled": {"count": 1, "total_amount": "500.00"}},
+                },
+            ],
+        )
+        # Property lookup and the grouped query
+        self.assertEqual(len(context.captured_queries), 2)
+
+    def test_day_detail_and_range_limits(self):
+        response = self.get(date="2025-01-01")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 3)
+
+        self.assertEqual(
+            self.get(start_date="2025-01-01", end_date="2026-01-02").status_code, 400
+        )
+        self.assertEqual(
+            self.get(start_date="2025-02-01", end_date="2025-01-01").status_code, 400
+        )
+
+
+class RentRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("rollups", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.property = Property.objects.create(
+            user=self.user, name="Main", address="1 Main St"
+        )
+        self.revenue = Account.objects.create(
+            user=self.user, name="Revenue", type="revenue"
+        )
+        self.property.accounts.add(self.revenue)
+        self.entity = Entity.objects.create(
+            user=self.user, property=self.property, name="Tenant"
+        )
+
+    def create_payment(self, day, status, amount="800.00"):
+        response = self.client.post(
+            f"/api/rentPayments/?property_id={self.property.id}",
+            {
+                "entity_id": self.entity.id,
+                "date": day,
+                "status": status,
+                "amount": amount,
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()["id"]
+
+    def summary(self, year, month):
+        response = self.client.get(
+            "/api/rentPayments/monthsummary/",
+            {"property_id": self.property.id, "year": year, "month": month},
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_writes_keep_the_rollup_current(self):
+        first = self.create_payment("2025-01-01", "due")
+        self.create_payment("2025-01-15", "paid", "700.00")
+        self.create_payment("2025-02-01", "due")
+
+        self.client.put(f"/api/rentPayments/{first}/", {"status": "paid"}, format="json")
+        summary = self.summary(2025, 1)
+        self.assertEqual(summary["total_rent_payments"], 1500.0)
+        self.assertEqual(
+            summary["payment_summary"], [{"status": "paid", "count": 2, "amount": 1500.0}]
+        )
+
+        self.client.put(f"/api/rentPayments/{first}/", {"date": "2025-02-03"}, format="json")
+        self.client.put(f"/api/rentPayments/{first}/", {"is_deleted": True}, format="json")
+        self.assertEqual(self.summary(2025, 1)["total_rent_payments"], 700.0)
+        self.assertEqual(self.summary(2025, 2)["total_rent_payments"], 800.0)
+
+        def rollup_rows():
+            return list(
+                RentPaymentRollup.objects.filter(count__gt=0)
+                .order_by("month", "status")
+                .values_list("month", "status", "count", "total_amount")
+            )
+
+        incremental = rollup_rows()
+        RentPaymentRollup.rebuild()
+        self.assertEqual(rollup_rows(), incremental)
+
+    def test_writes_post_balances_before_rollups(self):
+        def write_order(method, *args):
+            with CaptureQueriesContext(connection) as context:
+                response = method(*args, format="json")
+            self.assertIn(response.status_code, (200, 201), response.content)
+
+            # The table each INSERT or UPDATE writes to, in order
+            written = [
+                query["sql"].split("(")[0].split(" SET ")[0].split()[-1].strip('"')
+                for query in context.captured_queries
+                if query["sql"].startswith(("INSERT", "UPDATE"))
+            ]
+            tables = [
+                table
+                for table in written
+                if table in ("core_backend_account", "core_backend_rentpaymentrollup")
+            ]
+            return tables[0], tables[-1]
+
+        url = f"/api/rentPayments/?property_id={self.property.id}"
+        body = {"entity_id": self.entity.id, "date": "2025-01-01", "status": "paid"}
+        self.assertEqual(
+            write_order(self.client.post, url, {**body, "amount": "800.00"}),
+            ("core_backend_account", "core_backend_rentpaymentrollup"),
+        )
+        payment = RentPayment.objects.get()
+        self.assertEqual(
+            write_order(
+                self.client.put,
+                f"/api/rentPayments/{payment.id}/",
+                {"amount": "900.00", "date": "2025-02-01"},
+            ),
+            ("core_backend_account", "core_backend_rentpaymentrollup"),
+        )
+
+        # Edits of a deleted payment leave the balance alone
+        self.client.put(
+            f"/api/rentPayments/{payment.id}/", {"is_deleted": True}, format="json"
+        )
+        self.client.put(
+            f"/api/rentPayments/{payment.id}/", {"amount": "950.00"}, format="json"
+        )
+        self.revenue.refresh_from_db()
+        self.assertEqual(self.revenue.balance, Decimal("0.00"))
+        self.assertEqual(self.revenue.audit_balance(), self.revenue.balance)
+
+    def test_trend_reads_one_row_per_month(self):
+        self.create_payment("2024-12-01", "paid")
+        self.create_payment("2025-02-01", "due")
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                "/api/rentPayments/trend/",
+                {"property_id": self.property.id, "year": 2025, "month": 2, "months": 3},
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(
+            [
+                (row["year"], row["month"], row["total_rent_payments"])
+                for row in response.json()
+            ],
+            [(2024, 12, 800.0), (2025, 1, 0.0), (2025, 2, 800.0)],
+        )
+        self.assertEqual(len(context.captured_queries), 2)
+
+
+class RentScheduleTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("schedules", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.property = Property.objects.create(
+            user=self.user, name="Main", address="1 Main St"
+        )
+        self.entity = Entity.objects.create(
+            user=self.user, property=self.property, name="Tenant"
+        )
+
+    def test_generation_is_idempotent_and_clamps_short_months(self):
+        response = self.client.post(
+            f"/api/rentSchedules/?property_id={self.property.id}",
+            {
+                "entity_id": self.entity.id,
+                "amount": "900.00",
+                "day_of_month": 31,
+                "start_date": "2025-01-15",
+                "end_date": "2025-03-31",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        schedule = RentSchedule.objects.get(pk=response.json()["id"])
+
+        # The end date keeps April out and the start date keeps January in
+        created = RentSchedule.generate_payments(months=4, today=date(2025, 1, 10))
+        self.assertEqual(created, {self.property.id: 3})
+        self.assertEqual(
+            list(schedule.rent_payments.order_by("date").values_list("date", "status")),
+            [
+                (date(2025, 1, 31), "scheduled"),
+                (date(2025, 2, 28), "scheduled"),
+                (date(2025, 3, 31), "scheduled"),
+            ],
+        )
+        self.assertEqual(
+            RentPaymentRollup.objects.get(
+                property=self.property, month=date(2025, 2, 1), status="scheduled"
+            ).total_amount,
+            Decimal("900.00"),
+        )
+
+        self.assertEqual(
+            RentSchedule.generate_payments(months=4, today=date(2025, 1, 10)), {}
+        )
+        self.assertEqual(schedule.rent_payments.count(), 3)
+
+    def test_generate_endpoint_bounds_months(self):
+        response = self.client.post(
+            f"/api/rentSchedules/generate/?property_id={self.property.id}",
+            {"months": 0},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class PropertyBootstrapTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("bootstrap", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.property = Property.objects.create(
+            user=self.user, name="Main", address="1 Main St"
+        )
+        self.bank = Account.objects.create(user=self.user, name="Bank", type="bank")
+        self.property.accounts.add(self.bank)
+
+    def add_rows(self, count):
+        for i in range(count):
+            entity = Entity.objects.create(
+                user=self.user, property=self.property, name=f"Tenant {i}"
+            )
+            Transaction.objects.create(
+                user=self.user,
+                account=self.bank,
+                property=self.property,
+                entity=entity,
+                date=date(2025, 1, 1 + i),
+                amount=Decimal("10.00"),
+                type="debit",
+            )
+            ReportHistory.objects.create(
+                user=self.user, property=self.property, type="balance_sheet"
+            )
+        RentPayment.objects.create(
+            user=self.user,
+            property=self.property,
+            amount=Decimal("800.00"),
+            date=date.today(),
+            status="due",
+        )
+        RentPaymentRollup.rebuild()
+
+    def bootstrap(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/api/properties/{self.property.id}/bootstrap/")
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json(), len(queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self.add_rows(1)
+        _, baseline = self.bootstrap()
+
+        self.add_rows(5)
+        data, queries = self.bootstrap()
+        self.assertEqual(queries, baseline)
+        self.assertLessEqual(queries, 6)
+
+        self.assertEqual(len(data["entities"]), 6)
+        self.assertEqual(
+            set(data["accounts"][0]),
+            {"id", "name", "type", "balance", "is_active", "is_deleted"},
+        )
+        self.assertEqual(data["transactions"][0]["date"], "2025-01-05")
+        self.assertEqual(data["transactions"][0]["account"]["name"], "Bank")
+        self.assertEqual(len(data["reports"]), 6)
+        self.assertEqual(data["rent_summary"]["total_rent_payments"], 1600.0)
+
+    def test_other_users_property_is_not_found(self):
+        other = User.objects.create_user("other", password="pass")
+        self.client.force_authenticate(other)
+        response = self.client.get(f"/api/properties/{self.property.id}/bootstrap/")
+        self.assertEqual(response.status_code, 404)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("etags", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.property = Property.objects.create(
+            user=self.user, name="Main", address="1 Main St"
+        )
+        self.other_property = Property.objects.create(
+            user=self.user, name="Other", address="2 Main St"
+        )
+        self.bank = Account.objects.create(user=self.user, name="Bank", type="bank")
+        self.property.accounts.add(self.bank)
+        self.other_property.accounts.add(self.bank)
+        self.entity = Entity.objects.create(
+            user=self.user, property=self.property, name="Tenant"
+        )
+
+    def get(self, url, etag=None):
+        headers = {"If-None-Match": etag} if etag else {}
+        return self.client.get(url, headers=headers)
+
+    def test_unchanged_data_answers_304_before_running_the_view(self):
+        url = f"/api/accounts/?property_id={self.property.id}"
+        response = self.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        # Only the property lookup runs
+        with self.assertNumQueries(1):
+            response = self.get(url, etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        bootstrap_url = f"/api/properties/{self.property.id}/bootstrap/"
+        self.assertEqual(self.get(bootstrap_url, etag).status_code, 304)
+
+    def test_writes_change_the_etag(self):
+        url = f"/api/entities/?property_id={self.property.id}"
+        other_url = f"/api/entities/?property_id={self.other_property.id}"
+        etag = self.get(url)["ETag"]
+        other_etag = self.get(other_url)["ETag"]
+
+        response = self.client.post(
+            f"/api/transactions/?property_id={self.property.id}",
+            [
+                {
+                    "account_id": self.bank.id,
+                    "entity_id": self.entity.id,
+                    "date": "2025-01-01",
+                    "amount": "10.00",
+                    "type": "debit",
+                }
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+
+        response = self.get(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        # The shared bank account's balance shows in the other property too
+        self.assertEqual(self.get(other_url, other_etag).status_code, 200)
+
+    def test_account_writes_elsewhere_change_the_non_property_etag(self):
+        url = (
+            f"/api/accounts/?property_id={self.property.id}"
+            "&get_non_property_accounts=1"
+        )
+        etag = self.get(url)["ETag"]
+        self.assertEqual(self.get(url, etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f"/api/accounts/?property_id={self.other_property.id}",
+                {"name": "Savings", "type": "bank"},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 201, response.content)
+
+        response = self.get(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([account["name"] for account in response.json()], ["Savings"])
+        etag = response["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(
+                f"/api/accounts/{response.json()[0]['id']}/",
+                {"name": "Reserve"},
+                format="json",
+            )
+        response = self.get(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["name"], "Reserve")
+
+
+class ListCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        list_cache.reset_stats()
+
+        self.user = User.objects.create_user("cached", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.property = Property.objects.create(
+            user=self.user, name="Main", address="1 Main St"
+        )
+        self.other_property = Property.objects.create(
+            user=self.user, name="Other", address="2 Main St"
+        )
+        self.bank = Account.objects.create(user=self.user, name="Bank", type="bank")
+        self.property.accounts.add(self.bank)
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_hits_skip_the_queries_until_a_write_invalidates(self):
+        url = f"/api/accounts/?property_id={self.property.id}"
+        self.get(url)
+
+        # Only the property lookup runs on a hit
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get(url)[0]["name"], "Bank")
+        self.assertEqual(self.get(url + "&get_non_property_accounts=1"), [])
+        self.assertEqual(
+            list_cache.stats()[list_cache.ACCOUNTS], {"hits": 1, "misses": 2}
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(
+                f"/api/accounts/{self.bank.id}/", {"name": "Checking"}, format="json"
+            )
+        self.assertEqual(self.get(url)[0]["name"], "Checking")
+        properties = self.get("/api/properties/")
+        self.assertEqual(properties[0]["accounts"][0]["name"], "Checking")
+
+    def test_entity_writes_only_invalidate_their_property(self):
+        url = f"/api/entities/?property_id={self.property.id}"
+        other_url = f"/api/entities/?property_id={self.other_property.id}"
+        self.get(url)
+        self.get(other_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {"name": "Tenant"}, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+
+        self.assertEqual([entity["name"] for entity in self.get(url)], ["Tenant"])
+        self.assertEqual(self.get(other_url), [])
+        self.assertEqual(
+            list_cache.stats()[list_cache.ENTITIES], {"hits": 1, "misses": 3}
+        )
+
+    def test_balance_writes_outside_the_views_invalidate(self):
+        url = f"/api/accounts/?property_id={self.property.id}"
+        self.assertEqual(self.get(url)[0]["balance"], "0.00")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bank.update_balance(
+                Transaction(type="debit", amount=Decimal("25.00"), date=date.today())
+            )
+        self.assertEqual(self.get(url)[0]["balance"], "25.00")
+
+        # Balance writes through the views invalidate once, from the ledger
+        entity = Entity.objects.create(
+            user=self.user, property=self.property, name="Tenant"
+        )
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self.client.post(
+                f"/api/transactions/?property_id={self.property.id}",
+                [
+                    {
+                        "account_id": self.bank.id,
+                        "entity_id": entity.id,
+                        "date": "2025-01-01",
+                        "amount": "5.00",
+                        "type": "debit",
+                    }
+                ],
+                format="json",
+            )
+        self.assertEqual(response.status_code, 201, response.content)
+        # One callback each for the accounts and properties scopes
+        self.assertEqual(len(callbacks), 2)
+        self.assertEqual(self.get(url)[0]["balance"], "30.00")
+
+        # The audit repair moves the drifted balance back to the ledger's
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command(
+                "audit_balances", "--workers", "1", "--repair", stdout=StringIO()
+            )
+        self.assertEqual(self.get(url)[0]["balance"], "5.00")
+
+    def test_responses_are_not_shared_between_users(self):
+        self.get("/api/properties/")
+
+        other = User.objects.create_user("uncached", password="pass")
+        self.client.force_authenticate(other)
+        self.assertEqual(self.get("/api/properties/"), [])
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("pages", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.property = Property.objects.create(
+            user=self.user, name="Main", address="1 Main St"
+        )
+        account = Account.objects.create(user=self.user, name="Bank", type="bank")
+        entity = Entity.objects.create(
+            user=self.user, property=self.property, name="Tenant"
+        )
+
+        # Most rows share a date, so pages have to break ties on id
+        days = [date(2025, 1, 2)] * 5 + [date(2025, 1, 1), date(2025, 1, 3)]
+        Transaction.objects.bulk_create(
+            Transaction(
+                user=self.user,
+                property=self.property,
+                account=account,
+                entity=entity,
+                date=day,
+                amount=Decimal("10.00"),
+                type="debit",
+            )
+            for day in days
+        )
+
+    def get(self, **params):
+        return self.client.get(
+            "/api/transactions/", {"property_id": self.property.id, **params}
+        )
+
+    def test_cursor_walks_every_row_once_in_date_order(self):
+        expected = list(
+            Transaction.objects.order_by("date", "pk").values_list("pk", flat=True)
+        )
+
+        seen = []
+        params = {"page_size": 2}
+        while True:
+            response = self.get(**params)
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            self.assertLessEqual(len(page["results"]), 2)
+            seen.extend(row["id"] for row in page["results"])
+
+            if page["next_cursor"] is None:
+                break
+            params["cursor"] = page["next_cursor"]
+
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursors_and_page_sizes_are_rejected(self):
+        tampered = base64.urlsafe_b64encode(b"2025-01-02|not-an-id").decode()
+        for params in (
+            {"cursor": "not a cursor"},
+            {"cursor": tampered},
+            {"page_size": "0"},
+            {"page_size": "ten"},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.get(**params).status_code, 400)
+
+    def test_page_size_is_clamped(self):
+        page = self.get(page_size=5000).json()
+        self.assertEqual(page["page_size"], KeysetPagination.max_page_size)
+        self.assertEqual(len(page["results"]), 7)
+        self.assertIsNone(page["next_cursor"])
+
+    def test_lists_are_unpaginated_by_default(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.json(), list)
+        self.assertEqual(len(response.json()), 7)
+
+
+class DynamicFieldsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("fields", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.property = Property.objects.create(
+            user=self.user, name="Main", address="1 Main St"
+        )
+        self.bank = Account.objects.create(
+            user=self.user, name="Bank", type="bank", description="Checking"
+        )
+        self.property.accounts.add(self.bank)
+        entity = Entity.objects.create(
+            user=self.user, property=self.property, name="Tenant"
+        )
+        Transaction.objects.create(
+            user=self.user,
+            property=self.property,
+            account=self.bank,
+            entity=entity,
+            date=date(2025, 1, 5),
+            amount=Decimal("10.00"),
+            type="debit",
+            memo="January",
+        )
+
+    def get(self, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                "/api/transactions/", {"property_id": self.property.id, **params}
+            )
+        self.assertEqual(response.status_code, 200)
+
+        # The query that loads the transactions themselves
+        sql = next(
+            query["sql"]
+            for query in context.captured_queries
+            if 'FROM "core_backend_transaction"' in query["sql"]
+        )
+        return response.json()[0], sql
+
+    def test_fields_limit_the_keys_and_the_columns(self):
+        row, sql = self.get(fields="id,date,amount")
+        self.assertEqual(set(row), {"id", "date", "amount"})
+        self.assertNotIn('"core_backend_transaction"."memo"', sql)
+
+        row, sql = self.get()
+        self.assertEqual(row["memo"], "January")
+        self.assertIn('"core_backend_transaction"."memo"', sql)
+
+    def test_relations_are_compact_unless_expanded(self):
+        row, sql = self.get()
+        self.assertEqual(row["account"], {"id": self.bank.id, "name": "Bank"})
+        self.assertEqual(set(row["property"]), {"id", "name"})
+        self.assertNotIn('"core_backend_account"."description"', sql)
+
+        row, sql = self.get(expand="account,property.accounts")
+        self.assertEqual(row["account"]["type"], "bank")
+        self.assertEqual(row["account"]["description"], "Checking")
+        self.assertIn('"core_backend_account"."description"', sql)
+        self.assertEqual(row["property"]["address"], "1 Main St")
+        self.assertEqual(
+            [account["name"] for account in row["property"]["accounts"]], ["Bank"]
+        )
+        self.assertEqual(row["entity"]["name"], "Tenant")
+        self.assertNotIn("company", row["entity"])
+
+
+class TransactionBatchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("batches", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.property = Property.objects.create(
+            user=self.user, name="Main", address="1 Main St"
+        )
+        self.bank = Account.objects.create(user=self.user, name="Bank", type="bank")
+        self.expense = Account.objects.create(
+            user=self.user, name="Repairs", type="expense"
+        )
+        self.property.accounts.add(self.bank, self.expense)
+        self.entity = Entity.objects.create(
+            user=self.user, property=self.property, name="Vendor"
+        )
+        self.url = f"/api/transactions/?property_id={self.property.id}"
+
+    def row(self, account, type, amount, day="2025-01-05"):
+        return {
+            "account_id": account.id,
+            "entity_id": self.entity.id,
+            "type": type,
+            "amount": amount,
+            "date": day,
+        }
+
+    def test_batch_posts_balances_and_one_posting_per_account_day(self):
+        response = self.client.post(
+            self.url,
+            [
+                self.row(self.bank, "debit", "100.00"),
+                self.row(self.bank, "credit", "30.00"),
+                self.row(self.expense, "debit", "20.00", day="2025-01-06"),
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(len(response.json()), 3)
+
+        self.bank.refresh_from_db()
+        self.expense.refresh_from_db()
+        self.assertEqual(self.bank.balance, Decimal("70.00"))
+        self.assertEqual(self.expense.balance, Decimal("20.00"))
+        self.assertEqual(self.bank.audit_balance(), self.bank.balance)
+
+        self.assertEqual(
+            sorted(
+                LedgerPosting.objects.values_list(
+                    "account_id", "property_id", "date", "amount"
+                )
+            ),
+            [
+                (self.bank.id, self.property.id, date(2025, 1, 5), Decimal("70.00")),
+                (self.expense.id, self.property.id, date(2025, 1, 6), Decimal("20.00")),
+            ],
+        )
+
+    def test_one_bad_row_rejects_the_whole_batch(self):
+        stranger = User.objects.create_user("stranger", password="pass")
+        theirs = Entity.objects.create(user=stranger, name="Theirs")
+
+        # Fails validation in memory, and fails the bulk lookup of entities
+        for bad_row in (
+            self.row(self.bank, "debit", "not a number"),
+            {**self.row(self.bank, "debit", "5.00"), "entity_id": theirs.id},
+        ):
+            with self.subTest(bad_row=bad_row):
+                response = self.client.post(
+                    self.url,
+                    [self.row(self.bank, "debit", "100.00"), bad_row],
+                    format="json",
+                )
+                self.assertEqual(response.status_code, 400)
+
+        self.assertEqual(Transaction.objects.count(), 0)
+        self.assertEqual(LedgerPosting.objects.count(), 0)
+        self.bank.refresh_from_db()
+        self.assertEqual(self.bank.balance, Decimal("0.00"))
+
+    def test_large_batch_costs_a_fixed_number_of_queries(self):
+        def batch(count):
+            return [
+                self.row(
+                    (self.bank, self.expense)[i % 2],
+                    "debit",
+                    "1.25",
+                    day=f"2025-01-{i % 28 + 1:02d}",
+                )
+                for i in range(count)
+            ]
+
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(self.url, batch(2), format="json")
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.post(self.url, batch(60), format="json")
+
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(len(large), len(small))
+
+        self.bank.refresh_from_db()
+        self.assertEqual(self.bank.balance, Decimal("38.75"))
+
+
+class JournalBatchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("journals", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.property = Property.objects.create(
+            user=self.user, name="Main", address="1 Main St"
+        )
+        self.bank = Account.objects.create(user=self.user, name="Bank", type="bank")
+        self.expense = Account.objects.create(
+            user=self.user, name="Repairs", type="expense"
+        )
+        self.property.accounts.add(self.bank, self.expense)
+        self.url = f"/api/journals/?property_id={self.property.id}"
+
+    def journal(self, lines, day="2025-01-31", account=None):
+        items = []
+        for _ in range(lines):
+            items.append(
+                {"account_id": self.expense.id, "type": "debit", "amount": "1.50"}
+            )
+            items.append(
+                {
+                    "account_id": (account or self.bank).id,
+                    "type": "credit",
+                    "amount": "1.50",
+                }
+            )
+        return {"name": "Accrual", "date": day, "journal_items": items}
+
+    def test_large_journal_costs_a_fixed_number_of_queries(self):
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(self.url, self.journal(2), format="json")
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.post(self.url, self.journal(100), format="json")
+
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(len(response.json()["journal_items"]), 200)
+        # SQLite splits the item insert at its bound variable limit
+        self.assertLessEqual(len(large), len(small) + 1)
+
+        self.bank.refresh_from_db()
+        self.expense.refresh_from_db()
+        self.assertEqual(self.bank.balance, Decimal("-153.00"))
+        self.assertEqual(self.expense.balance, Decimal("153.00"))
+        self.assertEqual(self.bank.audit_balance(), self.bank.balance)
+
+    def test_batch_posts_every_journal_or_none(self):
+        response = self.client.post(
+            self.url,
+            [self.journal(1, "2025-01-31"), self.journal(2, "2025-02-28")],
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(
+            [journal["date"] for journal in response.json()],
+            ["2025-01-31", "2025-02-28"],
+        )
+
+        other = Account.objects.create(
+            user=User.objects.create_user("stranger", password="pass"),
+            name="Theirs",
+            type="bank",
+        )
+        response = self.client.post(
+            self.url, [self.journal(1), self.journal(1, account=other)], format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Journal.objects.count(), 2)
+        self.bank.refresh_from_db()
+        self.assertEqual(self.bank.balance, Decimal("-4.50"))
+
+    def test_unbalanced_journals_are_rejected_before_any_write(self):
+        unbalanced = self.journal(1)
+        unbalanced["journal_items"][0]["amount"] = "2.00"
+        untyped = self.journal(1)
+        untyped["journal_items"][1]["type"] = "noType"
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                self.url, [self.journal(1), unbalanced, untyped], format="json"
+            )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(
+            any("INSERT" in query["sql"] for query in queries.captured_queries)
+        )
+
+        errors = response.json()
+        self.assertEqual(errors[0], {})
+        self.assertEqual(
+            errors[1]["journal_items"],
+            ["Debits of 2.00 do not equal credits of 1.50, a difference of 0.50."],
+        )
+        self.assertEqual(len(errors[2]["journal_items"]), 2)
+
+        response = self.client.post(self.url, unbalanced, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("journal_items", response.json())
+        self.assertFalse(Journal.objects.exists())
+
+
+class JournalEditTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("edits", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.property = Property.objects.create(
+            user=self.user, name="Main", address="1 Main St"
+        )
+        self.bank = Account.objects.create(user=self.user, name="Bank", type="bank")
+        self.expense = Account.objects.create(
+            user=self.user, name="Repairs", type="expense"
+        )
+        self.property.accounts.add(self.bank, self.expense)
+
+        response = self.client.post(
+            f"/api/journals/?property_id={self.property.id}",
+            {
+                "name": "Repair",
+                "date": "2025-01-10",
+                "journal_items": [
+                    {"account_id": self.expense.id, "type": "debit", "amount": "80.00"},
+                    {"account_id": self.bank.id, "type": "credit", "amount": "80.00"},
+                ],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.journal = response.json()
+        self.url = f"/api/journals/{self.journal['id']}/"
+
+    def items(self, **changes):
+        items = [
+            {
+                "id": item["id"],
+                "account_id": item["account"]["id"],
+                "type": item["type"],
+                "amount": item["amount"],
+            }
+            for item in self.journal["journal_items"]
+        ]
+        for item in items:
+            item.update(changes)
+        return items
+
+    def balances(self):
+        return [
+            Account.objects.get(pk=account.pk).balance
+            for account in (self.bank, self.expense)
+        ]
+
+    def test_memo_edit_skips_balance_writes(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(
+                self.url, {"journal_items": self.items(memo="Roof")}, format="json"
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()["journal_items"][0]["memo"], "Roof")
+
+        sql = [query["sql"] for query in queries.captured_queries]
+        self.assertFalse(any('UPDATE "core_backend_account"' in query for query in sql))
+        self.assertFalse(any("core_backend_ledgerposting" in query for query in sql))
+        self.assertEqual(self.balances(), [Decimal("-80.00"), Decimal("80.00")])
+
+    def test_partial_items_are_checked_against_the_stored_lines(self):
+        ids = [item["id"] for item in self.journal["journal_items"]]
+
+        response = self.client.put(
+            self.url,
+            {"journal_items": [{"id": item_id, "memo": "Roof"} for item_id in ids]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(
+            [item["memo"] for item in response.json()["journal_items"]],
+            ["Roof", "Roof"],
+        )
+        self.assertEqual(self.balances(), [Decimal("-80.00"), Decimal("80.00")])
+
+        response = self.client.put(
+            self.url,
+            {"journal_items": [{"id": ids[0], "amount": "90.00"}, {"id": ids[1]}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.put(
+            self.url,
+            {"journal_items": [{"id": item_id, "amount": "90.00"} for item_id in ids]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.balances(), [Decimal("-90.00"), Decimal("90.00")])
+
+    def test_changed_lines_post_the_net_change(self):
+        items = self.items(amount="100.00")
+        items.append({"account_id": self.expense.id, "type": "debit", "amount": "5.00"})
+        items.append({"account_id": self.bank.id, "type": "credit", "amount": "5.00"})
+
+        response = self.client.put(
+            self.url, {"date": "2025-02-10", "journal_items": items}, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(response.json()["journal_items"]), 4)
+        self.assertEqual(self.balances(), [Decimal("-105.00"), Decimal("105.00")])
+
+        response = self.client.put(
+            self.url, {"journal_items": items[2:]}, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.balances(), [Decimal("-5.00"), Decimal("5.00")])
+        for account in (self.bank, self.expense):
+            account.refresh_from_db()
+            self.assertEqual(account.audit_balance(), account.balance)
+
+
+class StatementImportTests(TestCase):
+    CSV = (
+        "date,amount,payee,memo\n"
+        "2025-01-05,100.00,Tenant,January rent\n"
+        "02/03/2025,(25.50),Hardware,\n"
+        "not a date,10.00,Tenant,\n"
+        "2025-02-10,40.00,Tenant,\n"
+    )
+
+    OFX = (
+        "OFXHEADER:100\n<OFX><BANKTRANLIST>"
+        "<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20250105120000<TRNAMT>100.00"
+        "<NAME>Tenant<MEMO>January rent</STMTTRN>"
+        "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20250203<TRNAMT>-25.50"
+        "<NAME>Hardware</STMTTRN>"
+        "</BANKTRANLIST></OFX>"
+    )
+
+    def setUp(self):
+        self.user = User.objects.create_user("importer", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.property = Property.objects.create(
+            user=self.user, name="Main", address="1 Main St"
+        )
+        self.bank = Account.objects.create(user=self.user, name="Bank", type="bank")
+        self.property.accounts.add(self.bank)
+        Entity.objects.create(user=self.user, property=self.property, name="Tenant")
+        Entity.objects.create(user=self.user, property=self.property, name="Hardware")
+
+    def upload(self, content, name="statement.csv", **options):
+        response = self.client.post(
+            f"/api/transactions/import/?property_id={self.property.id}",
+            {
+                "file": SimpleUploadedFile(name, content),
+                "account_id": self.bank.id,
+                **options,
+            },
+            format="multipart",
+        )
+        return response
+
+    def events(self, response):
+        self.assertEqual(response.status_code, 200)
+        content = b"".join(response.streaming_content).decode()
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_csv_lines_are_parsed_or_reported(self):
+        lines = list(iter_csv_lines(BytesIO(self.CSV.encode())))
+
+        self.assertEqual(
+            lines[0],
+            (
+                2,
+                {
+                    "date": date(2025, 1, 5),
+                    "amount": Decimal("100.00"),
+                    "type": "debit",
+                    "payee": "Tenant",
+                    "memo": "January rent",
+                },
+            ),
+        )
+        self.assertEqual(lines[1][1]["type"], "credit")
+        self.assertEqual(lines[1][1]["amount"], Decimal("25.50"))
+        self.assertEqual(lines[1][1]["date"], date(2025, 2, 3))
+        self.assertEqual(str(lines[2][1]), "Invalid date 'not a date'.")
+
+    def test_ofx_lines_are_parsed(self):
+        lines = list(iter_ofx_lines(SimpleUploadedFile("s.ofx", self.OFX.encode())))
+
+        self.assertEqual([row_number for row_number, _ in lines], [1, 2])
+        self.assertEqual(lines[0][1]["date"], date(2025, 1, 5))
+        self.assertEqual(lines[0][1]["memo"], "January rent")
+        self.assertEqual(lines[1][1]["type"], "credit")
+        self.assertEqual(lines[1][1]["payee"], "Hardware")
+
+    def test_import_reports_failed_rows_and_chunks(self):
+        # The chunk holding the January row is rejected as a whole
+        PeriodClose.objects.create(
+            user=self.user, property=self.property, period_end=date(2025, 1, 31)
+        )
+
+        events = self.events(self.upload(self.CSV.encode(), chunk_size="2"))
+
+        progress = [event for event in events if event["event"] == "progress"]
+        self.assertEqual(len(progress), 2)
+        self.assertEqual([error["row"] for error in progress[0]["errors"]], [2, 3])
+        self.assertEqual([error["row"] for error in progress[1]["errors"]], [4])
+        self.assertEqual(
+            events[-1],
+            {
+                "event": "complete",
+                "rows_processed": 4,
+                "imported": 1,
+                "failed": 3,
+                "chunks_committed": 1,
+            },
+        )
+        self.assertEqual(
+            list(self.bank.transactions.values_list("date", flat=True)),
+            [date(2025, 2, 10)],
+        )
+
+    def test_bad_options_are_rejected_before_streaming(self):
+        for options in (
+            {"column_map": "[1]"},
+            {"column_map": '{"date": 1}'},
+            {"column_map": "{not json"},
+            {"chunk_size": "0"},
+            {"format": "xls"},
+        ):
+            with self.subTest(options=options):
+                response = self.upload(self.CSV.encode(), **options)
+                self.assertEqual(response.status_code, 400)
+
+    def test_unreadable_file_ends_the_stream_with_an_error_event(self):
+        content = self.CSV.encode() + b"2025-02-11,5.00,Tenant,\xff\xfe\n"
+
+        events = self.events(self.upload(content))
 
-# Create your tests here.
+        self.assertEqual(events[-2]["event"], "error")
+        self.assertIn("Could not read the file", events[-2]["error"])
+        self.assertEqual(events[-1]["event"], "complete")
+        self.assertEqual(events[-1]["imported"], 3)
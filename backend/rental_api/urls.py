@@ -7,19 +7,32 @@ urlpatterns = [
     path('auth/refresh/', views.CookieTokenRefreshView.as_view(), name='cookie-refresh'),
     path('auth/logout/', views.CookieLogoutView.as_view(), name='cookie-logout'),
     path('transactions/', views.TransactionListAPIView.as_view(), name='transaction-list'),
+    path('transactions/import/', views.TransactionImportAPIView.as_view(), name='transaction-import'),
     path('transactions/<int:pk>/', views.TransactionDetailAPIView.as_view(), name='transaction-detail'),
     path('accounts/', views.AccountListAPIView.as_view(), name='account-list'),
     path('accounts/<int:pk>/', views.AccountDetailAPIView.as_view(), name='account-detail'),
+    path('accounts/<int:pk>/balance/', views.AccountBalanceAPIView.as_view(), name='account-balance'),
+    path('accounts/<int:pk>/register/', views.AccountRegisterAPIView.as_view(), name='account-register'),
     path('entities/', views.EntityListAPIView.as_view(), name='entity-list'),
     path('entities/<int:pk>/', views.EntityDetailAPIView.as_view(), name='entity-detail'),
     path('journals/', views.JournalListAPIView.as_view(), name='journal-list'),
     path('journals/<int:pk>/', views.JournalDetailAPIView.as_view(), name='journal-detail'),
     path('properties/', views.PropertyListAPIView.as_view(), name='property-list'),
     path('properties/<int:pk>/', views.PropertyDetailAPIView.as_view(), name='property-detail'),
+    path('properties/<int:pk>/bootstrap/', views.PropertyBootstrapAPIView.as_view(), name='property-bootstrap'),
+    path('properties/<int:pk>/closes/', views.PropertyPeriodCloseAPIView.as_view(), name='property-period-closes'),
     path('rentPayments/', views.RentPaymentListAPIView.as_view(), name='rentPayment-list'),
     path('rentPayments/<int:pk>/', views.RentPaymentDetailAPIView.as_view(), name='rentPayment-detail'),
     path('rentPayments/monthsummary/', views.RentPaymentMonthSummaryAPIView.as_view(), name='rentPayment-monthsummary'),
+    path('rentPayments/trend/', views.RentPaymentTrendAPIView.as_view(), name='rentPayment-trend'),
+    path('rentPayments/calendar/', views.RentPaymentCalendarAPIView.as_view(), name='rentPayment-calendar'),
+    path('rentSchedules/', views.RentScheduleListAPIView.as_view(), name='rentSchedule-list'),
+    path('rentSchedules/generate/', views.RentScheduleGenerateAPIView.as_view(), name='rentSchedule-generate'),
+    path('rentSchedules/<int:pk>/', views.RentScheduleDetailAPIView.as_view(), name='rentSchedule-detail'),
     path('reports/', views.ReportHistoryListAPIView.as_view(), name='reports-list'),
+    path('reports/run/', views.ReportRunAPIView.as_view(), name='reports-run'),
+    path('reports/trial-balance/', views.TrialBalanceAPIView.as_view(), name='reports-trial-balance'),
+    path('reports/<int:pk>/', views.ReportHistoryDetailAPIView.as_view(), name='report-detail'),
     
     path('profile/', views.UserProfileAPIView.as_view(), name='user-profile'),
 ]
\ No newline at end of file
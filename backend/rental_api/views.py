@@ -1,6 +1,7 @@
 from django.shortcuts import render
 from django.conf import settings
 from django.middleware.csrf import get_token
+from django.http import StreamingHttpResponse
 
 # rental_api/views.py
 from rest_framework import status
@@ -15,10 +16,11 @@ from rest_framework_simplejwt.serializers import (
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
 from datetime import date
+from decimal import Decimal
 import calendar
+import json
 from django.db import transaction
-from django.db.models import Sum, Value, CharField
-from django.db.models.functions import Coalesce
+from django.db.models import Count, Sum
 from .serializers import (
     TransactionSerializer,
     AccountSerializer,
@@ -28,6 +30,8 @@ from .serializers import (
     RentPaymentSerializer,
     UserSerializer,
     ReportHistorySerializer,
+    PeriodCloseSerializer,
+    RentScheduleSerializer,
 )
 from core_backend.models import (
     Transaction,
@@ -36,9 +40,28 @@ from core_backend.models import (
     Journal,
     Property,
     RentPayment,
+    RentPaymentRollup,
+    RentSchedule,
     ReportHistory,
 )
-from .mixins import PropertyRequiredMixin
+from . import cache as list_cache
+from .mixins import ClosedPeriodMixin, ConditionalGetMixin, PropertyRequiredMixin
+from .pagination import KeysetPagination, RegisterPagination
+from .register import AccountRegister, RegisterError
+from .importers import (
+    DEFAULT_CHUNK_SIZE,
+    StatementImporter,
+    iter_statement_lines,
+)
+from .reports import (
+    ReportError,
+    close_period,
+    refresh_report_snapshot,
+    report_to_json,
+    run_report,
+    snapshot_report,
+    trial_balance,
+)
 
 
 def _set_auth_cookies(response, access_token, refresh_token=None):
@@ -178,8 +201,9 @@ class TransactionListAPIView(PropertyRequiredMixin, APIView):
         account_id = request.query_params.get("account_id")
         entity_id = request.query_params.get("entity_id")
 
-        transactions = Transaction.objects.filter(
-            user=request.user, property=property_obj
+        context = {"request": request}
+        transactions = TransactionSerializer(context=context).prepare_queryset(
+            Transaction.objects.filter(user=request.user, property=property_obj)
         )
 
         if account_id:
@@ -213,34 +237,33 @@ class TransactionListAPIView(PropertyRequiredMixin, APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-        serializer = TransactionSerializer(transactions, many=True)
+        paginator = KeysetPagination()
+        if paginator.is_requested(request):
+            page = paginator.paginate_queryset(transactions, request, view=self)
+            serializer = TransactionSerializer(page, many=True, context=context)
+            return paginator.get_paginated_response(serializer.data)
+
+        serializer = TransactionSerializer(transactions, many=True, context=context)
         return Response(serializer.data)
 
     @transaction.atomic
     def post(self, request):
-        data = request.data
-
         property_obj = self.property_obj
 
-        saved_transactions = []
-        for item in data:
-            serializer = TransactionSerializer(data=item, context={"request": request})
-            if serializer.is_valid():
-                transaction_instance = serializer.save(
-                    user=request.user, property=property_obj
-                )
-                if (
-                    hasattr(transaction_instance, "account")
-                    and transaction_instance.account
-                ):
-                    transaction_instance.account.update_balance(transaction_instance)
-                    saved_transactions.append(serializer.instance)
-            else:
-                # Handle validation errors for each transaction
-                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        # Validates the whole batch in memory before touching the database
+        serializer = TransactionSerializer(
+            data=request.data, many=True, context={"request": request}
+        )
+
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        saved_transactions = serializer.save(user=request.user, property=property_obj)
+        Property.bump_data_version(
+            [property_obj.id], [item.account_id for item in saved_transactions]
+        )
 
         if saved_transactions:
-            serializer = TransactionSerializer(saved_transactions, many=True)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         else:
             return Response(
@@ -249,7 +272,77 @@ class TransactionListAPIView(PropertyRequiredMixin, APIView):
             )
 
 
-class TransactionDetailAPIView(APIView):
+# Mixin to check for and verify property id.
+class TransactionImportAPIView(PropertyRequiredMixin, APIView):
+    """
+    API endpoint to import a CSV, OFX or QFX bank statement into an account.
+    Streams newline-delimited JSON progress events while rows are committed.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        property_obj = self.property_obj
+
+        statement_file = request.FILES.get("file")
+        if not statement_file:
+            return Response(
+                {"error": "A statement 'file' is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        file_format = request.data.get("format") or statement_file.name.rsplit(".", 1)[-1]
+        file_format = file_format.lower()
+
+        try:
+            column_map = json.loads(request.data.get("column_map") or "{}")
+            chunk_size = int(request.data.get("chunk_size") or DEFAULT_CHUNK_SIZE)
+            if chunk_size < 1:
+                raise ValueError("chunk_size must be positive")
+            lines = iter_statement_lines(statement_file, file_format, column_map)
+        except (ValueError, TypeError) as e:
+            return Response(
+                {"error": f"Invalid import options: {e}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            account = property_obj.accounts.get(
+                pk=request.data.get("account_id"), user=request.user
+            )
+        except (Account.DoesNotExist, ValueError):
+            return Response(
+                {
+                    "error": "Account with this ID does not exist or does not belong to the property."
+                },
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        default_entity = None
+        default_entity_id = request.data.get("default_entity_id")
+        if default_entity_id:
+            try:
+                default_entity = Entity.objects.get(
+                    pk=default_entity_id, user=request.user
+                )
+            except (Entity.DoesNotExist, ValueError):
+                return Response(
+                    {"error": "Entity with this ID does not exist."},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+
+        importer = StatementImporter(
+            request,
+            property_obj,
+            account,
+            default_entity=default_entity,
+            chunk_size=chunk_size,
+        )
+        events = (json.dumps(event) + "\n" for event in importer.run(lines))
+        return StreamingHttpResponse(events, content_type="application/x-ndjson")
+
+
+class TransactionDetailAPIView(ClosedPeriodMixin, APIView):
     """
     API endpoint to retrieve a single transaction by its primary key (id).
     """
@@ -265,10 +358,13 @@ class TransactionDetailAPIView(APIView):
     def get(self, request, pk):
         transaction = self.get_object(pk)
         if transaction:
-            serializer = TransactionSerializer(transaction)
+            serializer = TransactionSerializer(
+                transaction, context={"request": request}
+            )
             return Response(serializer.data)
         return Response(status=status.HTTP_404_NOT_FOUND)
 
+    @transaction.atomic
     def put(self, request, pk):
         transaction = self.get_object(pk)
         if not transaction:
@@ -279,19 +375,42 @@ class TransactionDetailAPIView(APIView):
         serializer = TransactionSerializer(transaction, data=request.data, partial=True)
 
         if serializer.is_valid():
+            error_response = self.closed_period_response(
+                transaction.property,
+                transaction.date,
+                serializer.validated_data.get("date", transaction.date),
+            )
+            if error_response:
+                return error_response
+
+            original_property_id = transaction.property_id
             original_account.update_balance(transaction, is_reversal=True)
             updated_transaction = serializer.save()
             updated_transaction.account.update_balance(updated_transaction)
+            Property.bump_data_version(
+                [original_property_id, updated_transaction.property_id],
+                [original_account.id, updated_transaction.account_id],
+            )
 
             return Response(serializer.data)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @transaction.atomic
     def delete(self, request, pk):
         transaction = self.get_object(pk)
         if transaction:
+            error_response = self.closed_period_response(
+                transaction.property, transaction.date
+            )
+            if error_response:
+                return error_response
+
             transaction.account.update_balance(transaction, is_reversal=True)
             transaction.delete()
+            Property.bump_data_version(
+                [transaction.property_id], [transaction.account_id]
+            )
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(status=status.HTTP_404_NOT_FOUND)
 
@@ -304,6 +423,15 @@ class AccountListAPIView(PropertyRequiredMixin, APIView):
 
     permission_classes = [IsAuthenticated]
 
+    def get_etag_version(self, request, property_obj):
+        version = super().get_etag_version(request, property_obj)
+
+        # Accounts of the user's other properties change without this one
+        if request.query_params.get("get_non_property_accounts"):
+            accounts = list_cache.generation(list_cache.ACCOUNTS, request.user.id)
+            version = f"{version}.{accounts}"
+        return version
+
     def get(self, request):
         property_obj = self.property_obj
 
@@ -321,8 +449,18 @@ class AccountListAPIView(PropertyRequiredMixin, APIView):
         else:
             account_queryset = property_obj.accounts.all()
 
-        serializer = AccountSerializer(account_queryset, many=True)
-        return Response(serializer.data)
+        def build():
+            context = {"request": request}
+            accounts = AccountSerializer(context=context).prepare_queryset(
+                account_queryset
+            )
+            return AccountSerializer(accounts, many=True, context=context).data
+
+        return Response(
+            list_cache.cached_list(
+                request, list_cache.ACCOUNTS, request.user.id, build, property_obj
+            )
+        )
 
     def post(self, request):
         property_obj = self.property_obj
@@ -334,6 +472,8 @@ class AccountListAPIView(PropertyRequiredMixin, APIView):
                     pk=request.data["id"], user=self.request.user
                 )
                 property_obj.accounts.add(account_obj)
+                Property.bump_data_version([property_obj.id])
+                list_cache.invalidate_accounts(request.user.id)
                 serializer = AccountSerializer(account_obj)
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             except Account.DoesNotExist:
@@ -356,6 +496,8 @@ class AccountListAPIView(PropertyRequiredMixin, APIView):
             if serializer.is_valid():
                 new_account = serializer.save(user=request.user)
                 property_obj.accounts.add(new_account)
+                Property.bump_data_version([property_obj.id])
+                list_cache.invalidate_accounts(request.user.id)
 
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -377,7 +519,7 @@ class AccountDetailAPIView(APIView):
             account = Account.objects.get(pk=pk)
         except Account.DoesNotExist:
             return Response(status=status.HTTP_404_NOT_FOUND)
-        serializer = AccountSerializer(account)
+        serializer = AccountSerializer(account, context={"request": request})
         return Response(serializer.data)
 
     def put(self, request, pk):
@@ -386,11 +528,80 @@ class AccountDetailAPIView(APIView):
             serializer = AccountSerializer(account, data=request.data, partial=True)
             if serializer.is_valid():
                 serializer.save()
+                Property.bump_data_version(account_ids=[account.id])
+                list_cache.invalidate_accounts(request.user.id)
                 return Response(serializer.data)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         return Response(status=status.HTTP_404_NOT_FOUND)
 
 
+class AccountBalanceAPIView(APIView):
+    """
+    API endpoint to look up an account's balance as of a date.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        try:
+            account = Account.objects.get(pk=pk, user=request.user)
+        except Account.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        as_of = request.query_params.get("as_of")
+        try:
+            as_of = date.fromisoformat(as_of) if as_of else date.today()
+        except ValueError:
+            return Response(
+                {"error": "Invalid 'as_of' date provided."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        balance = account.balance_as_of(as_of)
+        if balance is None:
+            return Response(
+                {"error": "Account has no normal balance to report."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(
+            {"account_id": account.id, "as_of": as_of, "balance": str(balance)}
+        )
+
+
+class AccountRegisterAPIView(APIView):
+    """
+    API endpoint to page through an account's postings in date order with a
+    running balance.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        try:
+            account = Account.objects.get(pk=pk, user=request.user)
+        except Account.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            register = AccountRegister(account)
+        except RegisterError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        paginator = RegisterPagination()
+        rows = paginator.paginate_register(register, request)
+        data = [
+            {
+                **row,
+                "amount": str(row["amount"]),
+                "change": str(row["change"]),
+                "running_balance": str(row["running_balance"]),
+            }
+            for row in rows
+        ]
+        return paginator.get_paginated_response(data)
+
+
 # Mixin to check for and verify property id.
 class EntityListAPIView(PropertyRequiredMixin, APIView):
     """
@@ -401,9 +612,19 @@ class EntityListAPIView(PropertyRequiredMixin, APIView):
 
     def get(self, request):
         property_obj = self.property_obj
-        entities_queryset = property_obj.entities.all()
-        serializer = EntitySerializer(entities_queryset, many=True)
-        return Response(serializer.data)
+
+        def build():
+            context = {"request": request}
+            entities = EntitySerializer(context=context).prepare_queryset(
+                property_obj.entities.all()
+            )
+            return EntitySerializer(entities, many=True, context=context).data
+
+        return Response(
+            list_cache.cached_list(
+                request, list_cache.ENTITIES, property_obj.id, build, property_obj
+            )
+        )
 
     def post(self, request):
         property_obj = self.property_obj
@@ -411,6 +632,8 @@ class EntityListAPIView(PropertyRequiredMixin, APIView):
 
         if serializer.is_valid():
             serializer.save(user=request.user, property=property_obj)
+            Property.bump_data_version([property_obj.id])
+            list_cache.invalidate(list_cache.ENTITIES, property_obj.id)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -430,22 +653,27 @@ class EntityDetailAPIView(APIView):
         entity = self.get_object(pk)
         if not entity:
             return Response(status=status.HTTP_404_NOT_FOUND)
-        serializer = EntitySerializer(entity)
+        serializer = EntitySerializer(entity, context={"request": request})
         return Response(serializer.data)
 
     def put(self, request, pk):
         entity = self.get_object(pk)
         if entity:
+            original_property_id = entity.property_id
             serializer = EntitySerializer(entity, data=request.data, partial=True)
             if serializer.is_valid():
                 serializer.save()
+                Property.bump_data_version([original_property_id, entity.property_id])
+                list_cache.invalidate(
+                    list_cache.ENTITIES, original_property_id, entity.property_id
+                )
                 return Response(serializer.data)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         return Response(status=status.HTTP_404_NOT_FOUND)
 
 
 # Mixin to check for and verify property id.
-class JournalListAPIView(PropertyRequiredMixin, APIView):
+class JournalListAPIView(ClosedPeriodMixin, PropertyRequiredMixin, APIView):
     """
     API endpoint to list journals.
     """
@@ -454,25 +682,55 @@ class JournalListAPIView(PropertyRequiredMixin, APIView):
 
     def get(self, request):
         property_obj = self.property_obj
-        journals_queryset = property_obj.journals.all().prefetch_related(
-            "journal_items__account"
+        context = {"request": request}
+        journals_queryset = JournalSerializer(context=context).prepare_queryset(
+            property_obj.journals.all()
         )
-        serializer = JournalSerializer(journals_queryset, many=True)
+
+        paginator = KeysetPagination()
+        if paginator.is_requested(request):
+            page = paginator.paginate_queryset(journals_queryset, request, view=self)
+            serializer = JournalSerializer(page, many=True, context=context)
+            return paginator.get_paginated_response(serializer.data)
+
+        serializer = JournalSerializer(journals_queryset, many=True, context=context)
         return Response(serializer.data)
 
+    @transaction.atomic
     def post(self, request):
         property_obj = self.property_obj
-        serializer = JournalSerializer(data=request.data, context={"request": request})
+
+        # A list posts a batch of journals, such as month-end accruals
+        many = isinstance(request.data, list)
+        serializer = JournalSerializer(
+            data=request.data, many=many, context={"request": request}
+        )
 
         if serializer.is_valid():
-            journal_instance = serializer.save(property=property_obj)
-            for item in journal_instance.journal_items.all():
-                item.account.update_balance(item)
+            journals_data = serializer.validated_data
+            if not many:
+                journals_data = [journals_data]
+
+            error_response = self.closed_period_response(
+                property_obj, *[journal_data["date"] for journal_data in journals_data]
+            )
+            if error_response:
+                return error_response
+
+            serializer.save(property=property_obj)
+            Property.bump_data_version(
+                [property_obj.id],
+                [
+                    item["account_id"]
+                    for journal_data in journals_data
+                    for item in journal_data["journal_items"]
+                ],
+            )
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class JournalDetailAPIView(APIView):
+class JournalDetailAPIView(ClosedPeriodMixin, APIView):
     """
     API endpoint to retrieve a single journal by its primary key (id).
     """
@@ -488,38 +746,53 @@ class JournalDetailAPIView(APIView):
     def get(self, request, pk):
         journal = self.get_object(pk)
         if journal:
-            serializer = JournalSerializer(journal)
+            serializer = JournalSerializer(journal, context={"request": request})
             return Response(serializer.data)
         return Response(status=status.HTTP_404_NOT_FOUND)
 
+    @transaction.atomic
     def put(self, request, pk):
         journal = self.get_object(pk)
+        if not journal:
+            return Response(status=status.HTTP_404_NOT_FOUND)
 
-        prev_journal_items = journal.journal_items.all()
-
-        if journal:
-            serializer = JournalSerializer(journal, data=request.data, partial=True)
-            if serializer.is_valid():
-
-                for item in prev_journal_items:
-                    item.account.update_balance(item, is_reversal=True)
+        serializer = JournalSerializer(
+            journal, data=request.data, partial=True, context={"request": request}
+        )
+        if serializer.is_valid():
+            error_response = self.closed_period_response(
+                journal.property,
+                journal.date,
+                serializer.validated_data.get("date", journal.date),
+            )
+            if error_response:
+                return error_response
 
-                journal_instance = serializer.save()
+            # Posts only the net balance change of the edit
+            serializer.save()
 
-                for item in journal_instance.journal_items.all():
-                    item.account.update_balance(item)
+            Property.bump_data_version(
+                [journal.property_id], serializer.balance_account_ids
+            )
 
-                return Response(serializer.data)
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        return Response(status=status.HTTP_404_NOT_FOUND)
+            return Response(serializer.data)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @transaction.atomic
     def delete(self, request, pk):
         journal = self.get_object(pk)
         if journal:
+            error_response = self.closed_period_response(journal.property, journal.date)
+            if error_response:
+                return error_response
 
-            for item in journal.journal_items.all():
+            journal_items = journal.journal_items.all()
+            for item in journal_items:
                 item.account.update_balance(item, is_reversal=True)
 
+            Property.bump_data_version(
+                [journal.property_id], [item.account_id for item in journal_items]
+            )
             journal.delete()
 
             return Response(status=status.HTTP_204_NO_CONTENT)
@@ -534,9 +807,18 @@ class PropertyListAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        properties = Property.objects.filter(user=request.user)
-        serializer = PropertySerializer(properties, many=True)
-        return Response(serializer.data)
+        def build():
+            context = {"request": request}
+            properties = PropertySerializer(context=context).prepare_queryset(
+                Property.objects.filter(user=request.user)
+            )
+            return PropertySerializer(properties, many=True, context=context).data
+
+        return Response(
+            list_cache.cached_list(
+                request, list_cache.PROPERTIES, request.user.id, build
+            )
+        )
 
     def post(self, request):
         serializer = PropertySerializer(data=request.data, context={"request": request})
@@ -571,6 +853,8 @@ class PropertyListAPIView(APIView):
                 else:
                     print(f"Error creating account {i}: {account_serializer.errors}")
 
+            list_cache.invalidate_accounts(request.user.id)
+
             if created_accounts:
                 property_instance.accounts.add(*created_accounts)
                 response_serializer = PropertySerializer(
@@ -584,7 +868,7 @@ class PropertyListAPIView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class PropertyDetailAPIView(APIView):
+class PropertyDetailAPIView(ConditionalGetMixin, APIView):
     """
     API endpoint to retrieve a single property by its primary key (id).
     """
@@ -597,10 +881,14 @@ class PropertyDetailAPIView(APIView):
         except Property.DoesNotExist:
             return None
 
+    def get_etag_property(self, request, pk):
+        self.property_obj = self.get_object(pk)
+        return self.property_obj
+
     def get(self, request, pk):
-        property = self.get_object(pk)
+        property = self.property_obj
         if property:
-            serializer = PropertySerializer(property)
+            serializer = PropertySerializer(property, context={"request": request})
             return Response(serializer.data)
         return Response(status=status.HTTP_404_NOT_FOUND)
 
@@ -610,6 +898,9 @@ class PropertyDetailAPIView(APIView):
             serializer = PropertySerializer(property, data=request.data, partial=True)
             if serializer.is_valid():
                 serializer.save()
+                Property.bump_data_version([property.id])
+                list_cache.invalidate_accounts(request.user.id)
+                list_cache.invalidate(list_cache.ENTITIES, property.id)
                 return Response(serializer.data)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         return Response(status=status.HTTP_404_NOT_FOUND)
@@ -618,12 +909,144 @@ class PropertyDetailAPIView(APIView):
         property = self.get_object(pk)
         if property:
             property.delete()
+            list_cache.invalidate_accounts(request.user.id)
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(status=status.HTTP_404_NOT_FOUND)
 
 
+class PropertyPeriodCloseAPIView(ConditionalGetMixin, APIView):
+    """
+    API endpoint to list a property's closed periods and close the next one.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get_object(self, pk):
+        try:
+            return Property.objects.get(pk=pk, user=self.request.user)
+        except Property.DoesNotExist:
+            return None
+
+    def get_etag_property(self, request, pk):
+        self.property_obj = self.get_object(pk)
+        return self.property_obj
+
+    def get(self, request, pk):
+        property_obj = self.property_obj
+        if not property_obj:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        period_closes = property_obj.period_closes.order_by(
+            "period_end"
+        ).prefetch_related("closing_balances__account")
+        serializer = PeriodCloseSerializer(period_closes, many=True)
+        return Response(serializer.data)
+
+    def post(self, request, pk):
+        property_obj = self.get_object(pk)
+        if not property_obj:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        serializer = PeriodCloseSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            period_close = close_period(
+                property_obj, serializer.validated_data["period_end"], user=request.user
+            )
+        except ReportError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        Property.bump_data_version([property_obj.id])
+        return Response(
+            PeriodCloseSerializer(period_close).data, status=status.HTTP_201_CREATED
+        )
+
+
+class PropertyBootstrapAPIView(ConditionalGetMixin, APIView):
+    """
+    API endpoint returning everything needed to first render a property in one
+    round trip: compact accounts and entities, the current month's rent
+    summary, the most recent transactions and the report history. Runs one
+    query per section whatever the number of rows.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    ACCOUNT_FIELDS = ("id", "name", "type", "balance", "is_active", "is_deleted")
+    ENTITY_FIELDS = ("id", "name", "company", "is_deleted")
+    RECENT_TRANSACTIONS = 50
+    RECENT_REPORTS = 20
+
+    def get_object(self, pk):
+        try:
+            return Property.objects.get(pk=pk, user=self.request.user)
+        except Property.DoesNotExist:
+            return None
+
+    def get_etag_property(self, request, pk):
+        self.property_obj = self.get_object(pk)
+        return self.property_obj
+
+    def get(self, request, pk):
+        property_obj = self.property_obj
+        if not property_obj:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        context = {"request": request}
+
+        account_serializer = AccountSerializer(
+            fields=self.ACCOUNT_FIELDS, context=context
+        )
+        accounts = account_serializer.prepare_queryset(
+            property_obj.accounts.order_by("pk")
+        )
+
+        entity_serializer = EntitySerializer(fields=self.ENTITY_FIELDS, context=context)
+        entities = entity_serializer.prepare_queryset(
+            property_obj.entities.order_by("pk")
+        )
+
+        transactions = TransactionSerializer(context=context).prepare_queryset(
+            property_obj.transactions.order_by("-date", "-id")
+        )[: self.RECENT_TRANSACTIONS]
+
+        reports = ReportHistorySerializer(context=context).prepare_queryset(
+            property_obj.reports.order_by("-report_ran_on_date", "-id")
+        )[: self.RECENT_REPORTS]
+
+        today = date.today()
+        rollups = RentPaymentRollup.objects.filter(
+            property=property_obj, month=today.replace(day=1)
+        )
+
+        return Response(
+            {
+                "property": {"id": property_obj.id, "name": property_obj.name},
+                "accounts": AccountSerializer(
+                    accounts, many=True, fields=self.ACCOUNT_FIELDS, context=context
+                ).data,
+                "entities": EntitySerializer(
+                    entities, many=True, fields=self.ENTITY_FIELDS, context=context
+                ).data,
+                "rent_summary": {
+                    "year": today.year,
+                    "month": today.month,
+                    **summarize_rollups(rollups),
+                },
+                "transactions": TransactionSerializer(
+                    transactions, many=True, context=context
+                ).data,
+                "reports": ReportHistorySerializer(
+                    reports, many=True, context=context
+                ).data,
+            }
+        )
+
+
 # Mixin to check for and verify property id.
-class RentPaymentListAPIView(PropertyRequiredMixin, APIView):
+class RentPaymentListAPIView(ClosedPeriodMixin, PropertyRequiredMixin, APIView):
     """
     API endpoint to list all rent Payments.
     """
@@ -637,7 +1060,10 @@ class RentPaymentListAPIView(PropertyRequiredMixin, APIView):
         month = request.query_params.get("month")
         format_by_day = request.query_params.get("format_by_day", "false").lower()
 
-        rent_payments = RentPayment.objects.filter(property=property_obj)
+        context = {"request": request}
+        rent_payments = RentPaymentSerializer(context=context).prepare_queryset(
+            RentPayment.objects.filter(property=property_obj)
+        )
 
         # data ranged by year and month
         if year and month:
@@ -668,7 +1094,9 @@ class RentPaymentListAPIView(PropertyRequiredMixin, APIView):
 
             payments_by_day = [[] for _ in range(num_days)]
 
-            serializer = RentPaymentSerializer(rent_payments, many=True)
+            serializer = RentPaymentSerializer(
+                rent_payments, many=True, context=context
+            )
 
             for payment_data in serializer.data:
                 payment_date_str = payment_data.get("date")
@@ -681,9 +1109,18 @@ class RentPaymentListAPIView(PropertyRequiredMixin, APIView):
 
             return Response(payments_by_day)
         else:
-            serializer = RentPaymentSerializer(rent_payments, many=True)
+            paginator = KeysetPagination()
+            if paginator.is_requested(request):
+                page = paginator.paginate_queryset(rent_payments, request, view=self)
+                serializer = RentPaymentSerializer(page, many=True, context=context)
+                return paginator.get_paginated_response(serializer.data)
+
+            serializer = RentPaymentSerializer(
+                rent_payments, many=True, context=context
+            )
             return Response(serializer.data)
 
+    @transaction.atomic
     def post(self, request):
         property_obj = self.property_obj
 
@@ -692,24 +1129,42 @@ class RentPaymentListAPIView(PropertyRequiredMixin, APIView):
         )
 
         if serializer.is_valid():
-            rent_payment_instance = serializer.save(
-                user=request.user, property=property_obj
+            error_response = self.closed_period_response(
+                property_obj, serializer.validated_data.get("date")
             )
+            if error_response:
+                return error_response
 
+            revenue_account = None
             if serializer.validated_data["status"] == "paid":
                 try:
                     revenue_account = property_obj.accounts.get(type="revenue")
-                    revenue_account.update_balance(rent_payment_instance)
                 except Account.DoesNotExist:
                     return Response(
                         {"error": "Revenue account not found for this property."},
                         status=status.HTTP_404_NOT_FOUND,
                     )
+
+            rent_payment_instance = serializer.save(
+                user=request.user, property=property_obj
+            )
+
+            # Rent writes lock the account balances before the rollups, so
+            # concurrent writes to the same property and month cannot deadlock
+            if revenue_account:
+                revenue_account.update_balance(rent_payment_instance)
+            RentPaymentRollup.apply_deltas(
+                RentPaymentRollup.deltas([rent_payment_instance])
+            )
+
+            Property.bump_data_version(
+                [property_obj.id], [revenue_account.id] if revenue_account else []
+            )
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class RentPaymentDetailAPIView(APIView):
+class RentPaymentDetailAPIView(ClosedPeriodMixin, APIView):
     """
     API endpoint to retrieve a single rent payment by its primary key (id).
     """
@@ -725,9 +1180,10 @@ class RentPaymentDetailAPIView(APIView):
             rent_payment = self.get_object(pk)
         except RentPayment.DoesNotExist:
             return Response(status=status.HTTP_404_NOT_FOUND)
-        serializer = RentPaymentSerializer(rent_payment)
+        serializer = RentPaymentSerializer(rent_payment, context={"request": request})
         return Response(serializer.data)
 
+    @transaction.atomic
     def put(self, request, pk):
         rent_payment = self.get_object(pk)
         property_obj = rent_payment.property
@@ -738,23 +1194,64 @@ class RentPaymentDetailAPIView(APIView):
                 rent_payment, data=request.data, partial=True
             )
             if serializer.is_valid():
+                error_response = self.closed_period_response(
+                    property_obj,
+                    rent_payment.date,
+                    serializer.validated_data.get("date", rent_payment.date),
+                )
+                if error_response:
+                    return error_response
+
                 revenue_account = property_obj.accounts.get(type="revenue")
 
                 # Was effecting balance
-                if previous_status == "paid":
-                    revenue_account.update_balance(rent_payment, is_reversal=True)
+                balance_deltas = {}
+                if previous_status == "paid" and not rent_payment.is_deleted:
+                    key = (revenue_account.id, rent_payment.date, property_obj.id)
+                    balance_deltas[key] = revenue_account.balance_delta(
+                        rent_payment, is_reversal=True
+                    )
 
+                rollup_deltas = RentPaymentRollup.deltas([rent_payment], sign=-1)
                 updated_item = serializer.save()
 
                 # Should now be effecting balance
                 if updated_item.status == "paid" and not updated_item.is_deleted:
-                    revenue_account.update_balance(updated_item)
+                    key = (revenue_account.id, updated_item.date, property_obj.id)
+                    balance_deltas[key] = balance_deltas.get(
+                        key, 0
+                    ) + revenue_account.balance_delta(updated_item)
+
+                # Rent writes lock the account balances before the rollups, so
+                # concurrent writes to the same property and month cannot deadlock
+                Account.apply_balance_deltas(balance_deltas)
+                RentPaymentRollup.apply_deltas(
+                    RentPaymentRollup.deltas([updated_item], deltas=rollup_deltas)
+                )
 
+                Property.bump_data_version([property_obj.id], [revenue_account.id])
                 return Response(serializer.data)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         return Response(status=status.HTTP_404_NOT_FOUND)
 
 
+def summarize_rollups(rollups):
+    """
+    Month summary fields from a month's rent rollups, with decimal amounts.
+    """
+    payments_summary = [
+        {"status": rollup.status, "count": rollup.count, "amount": rollup.total_amount}
+        for rollup in sorted(rollups, key=lambda rollup: rollup.status)
+        if rollup.count
+    ]
+    return {
+        "payment_summary": payments_summary,
+        "total_rent_payments": sum(
+            (item["amount"] for item in payments_summary), Decimal("0.00")
+        ),
+    }
+
+
 class RentPaymentMonthSummaryAPIView(PropertyRequiredMixin, APIView):
     """
     API endpoint to summarize rent payments for a month.
@@ -784,44 +1281,236 @@ class RentPaymentMonthSummaryAPIView(PropertyRequiredMixin, APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Total queryset for payments for the month
-        monthly_payments_queryset = RentPayment.objects.filter(
-            property=property_obj, date__year=year, date__month=month
+        rollups = RentPaymentRollup.objects.filter(
+            property=property_obj, month=date(year, month, 1)
+        )
+        return Response({"year": year, "month": month, **summarize_rollups(rollups)})
+
+
+class RentPaymentTrendAPIView(PropertyRequiredMixin, APIView):
+    """
+    API endpoint to summarize rent payments for each of the months up to and
+    including 'year' and 'month', for trend charts.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    MAX_MONTHS = 120
+
+    def get(self, request):
+        try:
+            year = int(request.query_params["year"])
+            month = int(request.query_params["month"])
+            months = int(request.query_params.get("months", 12))
+            end_month = date(year, month, 1)
+        except (KeyError, ValueError):
+            return Response(
+                {"error": "Valid 'year' and 'month' are required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if not (1 <= months <= self.MAX_MONTHS):
+            return Response(
+                {"error": f"'months' must be between 1 and {self.MAX_MONTHS}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        month_starts = []
+        for offset in range(months - 1, -1, -1):
+            index = end_month.year * 12 + end_month.month - 1 - offset
+            month_starts.append(date(index // 12, index % 12 + 1, 1))
+
+        rollups_by_month = {month_start: [] for month_start in month_starts}
+        for rollup in RentPaymentRollup.objects.filter(
+            property=self.property_obj,
+            month__gte=month_starts[0],
+            month__lte=end_month,
+        ):
+            rollups_by_month[rollup.month].append(rollup)
+
+        return Response(
+            [
+                {
+                    "year": month_start.year,
+                    "month": month_start.month,
+                    **summarize_rollups(rollups),
+                }
+                for month_start, rollups in rollups_by_month.items()
+            ]
         )
 
-        # Sums together the total amount for the month
-        grand_total_aggregation = monthly_payments_queryset.aggregate(
-            overall_total=Coalesce(
-                Sum("amount"), Value(0.00), output_field=CharField()
-            ),
+
+class RentPaymentCalendarAPIView(PropertyRequiredMixin, APIView):
+    """
+    API endpoint for a rent calendar. Returns per-day counts and totals by
+    status for a range of up to a year, or the payments of a single day when
+    'date' is given.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    MAX_RANGE_DAYS = 366
+
+    def get(self, request):
+        property_obj = self.property_obj
+        params = request.query_params
+        rent_payments = RentPayment.objects.filter(
+            property=property_obj, is_deleted=False
         )
 
-        # Groups payments by status and sums their amounts
-        status_summary = (
-            monthly_payments_queryset.values("status")
-            .annotate(
-                total_amount=Coalesce(
-                    Sum("amount"), Value(0.00), output_field=CharField()
-                ),
+        try:
+            day, start_date, end_date = (
+                date.fromisoformat(params[key]) if params.get(key) else None
+                for key in ("date", "start_date", "end_date")
+            )
+        except ValueError:
+            return Response(
+                {"error": "Invalid date provided."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Detail rows are fetched lazily for the day selected on the calendar
+        if day:
+            context = {"request": request}
+            day_payments = RentPaymentSerializer(context=context).prepare_queryset(
+                rent_payments.filter(date=day).order_by("pk")
+            )
+            serializer = RentPaymentSerializer(day_payments, many=True, context=context)
+            return Response(serializer.data)
+
+        if not start_date or not end_date or start_date > end_date:
+            return Response(
+                {"error": "'start_date' and 'end_date' are required, in order."},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-            .order_by("status")
+        if (end_date - start_date).days >= self.MAX_RANGE_DAYS:
+            return Response(
+                {"error": f"The range can span at most {self.MAX_RANGE_DAYS} days."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        day_totals = (
+            rent_payments.filter(date__gte=start_date, date__lte=end_date)
+            .values("date", "status")
+            .annotate(count=Count("id"), total_amount=Sum("amount"))
+            .order_by("date", "status")
         )
 
-        payments_summary = [
-            {"status": item["status"], "amount": item["total_amount"]}
-            for item in status_summary
-        ]
+        days = {}
+        for row in day_totals:
+            amount = str(row["total_amount"].quantize(Decimal("0.01")))
+            summary = days.setdefault(
+                row["date"], {"date": row["date"], "count": 0, "statuses": {}}
+            )
+            summary["count"] += row["count"]
+            summary["statuses"][row["status"]] = {
+                "count": row["count"],
+                "total_amount": amount,
+            }
 
         return Response(
             {
-                "year": year,
-                "month": month,
-                "payment_summary": payments_summary,
-                "total_rent_payments": grand_total_aggregation["overall_total"] or 0,
+                "start_date": start_date,
+                "end_date": end_date,
+                "days": list(days.values()),
             }
         )
 
 
+# Mixin to check for and verify property id.
+class RentScheduleListAPIView(PropertyRequiredMixin, APIView):
+    """
+    API endpoint to list and create recurring rent schedules.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        context = {"request": request}
+        schedules = RentScheduleSerializer(context=context).prepare_queryset(
+            self.property_obj.rent_schedules.order_by("pk")
+        )
+        serializer = RentScheduleSerializer(schedules, many=True, context=context)
+        return Response(serializer.data)
+
+    def post(self, request):
+        serializer = RentScheduleSerializer(
+            data=request.data, context={"request": request}
+        )
+        if serializer.is_valid():
+            serializer.save(property=self.property_obj)
+            Property.bump_data_version([self.property_obj.id])
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class RentScheduleDetailAPIView(APIView):
+    """
+    API endpoint to retrieve and update a single rent schedule.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get_object(self, pk):
+        try:
+            return RentSchedule.objects.get(pk=pk, user=self.request.user)
+        except RentSchedule.DoesNotExist:
+            return None
+
+    def get(self, request, pk):
+        schedule = self.get_object(pk)
+        if not schedule:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        serializer = RentScheduleSerializer(schedule, context={"request": request})
+        return Response(serializer.data)
+
+    def put(self, request, pk):
+        schedule = self.get_object(pk)
+        if not schedule:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        serializer = RentScheduleSerializer(
+            schedule, data=request.data, partial=True, context={"request": request}
+        )
+        if serializer.is_valid():
+            serializer.save()
+            Property.bump_data_version([schedule.property_id])
+            return Response(serializer.data)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+# Mixin to check for and verify property id.
+class RentScheduleGenerateAPIView(PropertyRequiredMixin, APIView):
+    """
+    API endpoint to materialize the scheduled rent payments of a property's
+    schedules for the coming months.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    MAX_MONTHS = 24
+
+    def post(self, request):
+        try:
+            months = int(request.data.get("months", 3))
+        except (TypeError, ValueError):
+            months = 0
+
+        if not (1 <= months <= self.MAX_MONTHS):
+            return Response(
+                {"error": f"'months' must be between 1 and {self.MAX_MONTHS}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        created = RentSchedule.generate_payments(
+            months=months, schedules=self.property_obj.rent_schedules.all()
+        )
+        return Response(
+            {"months": months, "created": created.get(self.property_obj.id, 0)},
+            status=status.HTTP_201_CREATED,
+        )
+
+
 # Mixin to check for and verify property id.
 class ReportHistoryListAPIView(PropertyRequiredMixin, APIView):
     """
@@ -832,8 +1521,13 @@ class ReportHistoryListAPIView(PropertyRequiredMixin, APIView):
 
     def get(self, request):
         property_obj = self.property_obj
-        reports_queryset = property_obj.reports.all()
-        serializer = ReportHistorySerializer(reports_queryset, many=True)
+        context = {"request": request}
+        reports_queryset = ReportHistorySerializer(context=context).prepare_queryset(
+            property_obj.reports.all()
+        )
+        serializer = ReportHistorySerializer(
+            reports_queryset, many=True, context=context
+        )
         return Response(serializer.data)
 
     def post(self, request):
@@ -843,11 +1537,110 @@ class ReportHistoryListAPIView(PropertyRequiredMixin, APIView):
         )
 
         if serializer.is_valid():
-            serializer.save(user=request.user, property=property_obj)
+            report = serializer.save(user=request.user, property=property_obj)
+
+            try:
+                snapshot_report(report)
+            except ReportError:
+                # Reports without a computable range are recorded unsnapshotted
+                pass
+
+            Property.bump_data_version([property_obj.id])
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class ReportHistoryDetailAPIView(APIView):
+    """
+    API endpoint to re-open a historical report with its cached result,
+    refreshed from the ledger postings made since it was computed.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        try:
+            report = ReportHistory.objects.select_related("property").get(
+                pk=pk, user=request.user
+            )
+        except ReportHistory.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            snapshot_status = refresh_report_snapshot(report)
+        except ReportError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # A refreshed snapshot changes the report history list
+        if snapshot_status != "cached":
+            Property.bump_data_version([report.property_id])
+
+        serializer = ReportHistorySerializer(report, context={"request": request})
+        return Response(
+            {
+                **serializer.data,
+                "result": report.result,
+                "snapshot_status": snapshot_status,
+            }
+        )
+
+
+class ReportRunAPIView(PropertyRequiredMixin, APIView):
+    """
+    API endpoint to compute a balance sheet or profit & loss statement for a
+    property from grouped ledger aggregates.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        params = request.query_params
+
+        try:
+            start_date, end_date = (
+                date.fromisoformat(params[key]) if params.get(key) else None
+                for key in ("start_date", "end_date")
+            )
+        except ValueError:
+            return Response(
+                {"error": "Invalid start_date or end_date provided."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            report = run_report(
+                self.property_obj,
+                params.get("type"),
+                params.get("report_range_type", "all_time"),
+                start_date,
+                end_date,
+            )
+        except ReportError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(report_to_json(report))
+
+
+class TrialBalanceAPIView(PropertyRequiredMixin, APIView):
+    """
+    API endpoint to compute a property's trial balance as of a date.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        as_of = request.query_params.get("as_of")
+        try:
+            as_of = date.fromisoformat(as_of) if as_of else date.today()
+        except ValueError:
+            return Response(
+                {"error": "Invalid 'as_of' date provided."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(report_to_json(trial_balance(self.property_obj, as_of)))
+
+
 class UserProfileAPIView(APIView):
     """
     API endpoint to retrieve and update the authenticated user's profile.